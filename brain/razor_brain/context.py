@@ -7,11 +7,17 @@ Handles implicit references, entity tracking, and multi-turn continuity.
 
 from __future__ import annotations
 
+import heapq
 import time
 import uuid
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
+
+# Recency clock indirection — entity ordering only needs a monotonically
+# increasing integer, and tests patch this to avoid real sleeps.
+_clock_ns = time.monotonic_ns
 
 
 class Role(str, Enum):
@@ -20,24 +26,47 @@ class Role(str, Enum):
     SYSTEM = "system"
 
 
-@dataclass
+@dataclass(slots=True)
 class Entity:
     """A tracked entity extracted from conversation (person, deal, company, etc.)."""
 
     id: str
     canonical_name: str
     entity_type: str  # person, company, deal, location, phone, etc.
+    canonical_name_lower: str = ""  # normalized once at construction
     aliases: list[str] = field(default_factory=list)
-    metadata: dict[str, Any] = field(default_factory=dict)
-    last_referenced_at: float = 0.0
+    metadata: Optional[dict[str, Any]] = None  # lazy — most entities carry none
+    last_referenced_at: int = 0  # monotonic ns — ordering only, not wall time
     reference_count: int = 0
+    _cached_dict: Optional[dict[str, Any]] = field(default=None, repr=False, compare=False)
+    _alias_lower: set[str] = field(default_factory=set, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.canonical_name_lower:
+            self.canonical_name_lower = self.canonical_name.lower().strip()
 
     def touch(self) -> None:
-        self.last_referenced_at = time.time()
+        self.last_referenced_at = _clock_ns()
         self.reference_count += 1
-
-
-@dataclass
+        self._cached_dict = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Brain-payload projection, memoized until the entity mutates."""
+        d = self._cached_dict
+        if d is None:
+            d = {
+                "id": self.id,
+                "name": self.canonical_name,
+                "type": self.entity_type,
+                "aliases": self.aliases,
+                "metadata": self.metadata or {},
+                "ref_count": self.reference_count,
+            }
+            self._cached_dict = d
+        return d
+
+
+@dataclass(slots=True)
 class Turn:
     """A single conversational exchange."""
 
@@ -45,9 +74,102 @@ class Turn:
     role: Role
     content: str
     timestamp: float
-    entities_mentioned: list[str] = field(default_factory=list)  # entity IDs
+    role_str: str = ""  # precomputed role.value for hot serialization
+    entities_mentioned: Optional[list[str]] = None  # entity IDs, lazy
     intent: Optional[str] = None
-    metadata: dict[str, Any] = field(default_factory=dict)
+    metadata: Optional[dict[str, Any]] = None  # lazy — pure chat turns carry none
+    _cached_dict: Optional[dict[str, Any]] = field(default=None, repr=False, compare=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Brain-payload projection, memoized (turns are write-once)."""
+        d = self._cached_dict
+        if d is None:
+            d = {
+                "role": self.role_str,
+                "content": self.content,
+                "timestamp": self.timestamp,
+                "intent": self.intent,
+                "entities": self.entities_mentioned or (),
+            }
+            self._cached_dict = d
+        return d
+
+
+# ─── Turn Pool ────────────────────────────────────────────────────────
+# Recycles slotted Turn instances across sessions. Turns are retained for
+# the whole session (audit history), so the release point is session
+# replacement — see ConversationContext.recycle().
+
+_turn_pool: list[Turn] = []
+_TURN_POOL_MAX = 256
+
+
+def _acquire_turn(
+    id: str,
+    role: Role,
+    content: str,
+    timestamp: float,
+    entities_mentioned: Optional[list[str]] = None,
+    intent: Optional[str] = None,
+    metadata: Optional[dict[str, Any]] = None,
+) -> Turn:
+    """Pop a pooled Turn and re-initialize it in place, or allocate fresh."""
+    role_str = role.value
+    if _turn_pool:
+        turn = _turn_pool.pop()
+        turn.id = id
+        turn.role = role
+        turn.role_str = role_str
+        turn.content = content
+        turn.timestamp = timestamp
+        turn.entities_mentioned = entities_mentioned
+        turn.intent = intent
+        turn.metadata = metadata
+        turn._cached_dict = None
+        return turn
+    return Turn(
+        id=id,
+        role=role,
+        role_str=role_str,
+        content=content,
+        timestamp=timestamp,
+        entities_mentioned=entities_mentioned,
+        intent=intent,
+        metadata=metadata,
+    )
+
+
+def _release_turn(turn: Turn) -> None:
+    if len(_turn_pool) < _TURN_POOL_MAX:
+        turn.content = ""
+        turn.entities_mentioned = None
+        turn.intent = None
+        turn.metadata = None
+        turn._cached_dict = None
+        _turn_pool.append(turn)
+
+
+# Fixed-shape payload templates — dict.copy() of a pre-sized dict beats
+# sequential key insertion into an empty one.
+_BRAIN_CTX_TEMPLATE: dict[str, Any] = {
+    "session_id": None,
+    "session_summary": None,
+    "current_topic": None,
+    "topic_history": None,
+    "turns": None,
+    "tracked_entities": None,
+    "turn_count": None,
+    "session_age_seconds": None,
+}
+
+_TO_DICT_TEMPLATE: dict[str, Any] = {
+    "session_id": None,
+    "created_at": None,
+    "turn_count": None,
+    "entity_count": None,
+    "current_topic": None,
+    "session_summary": None,
+}
 
 
 class ConversationContext:
@@ -60,6 +182,22 @@ class ConversationContext:
     - Maintains a session-level summary that compresses older context
     """
 
+    __slots__ = (
+        "session_id",
+        "window_size",
+        "max_entities",
+        "_turns",
+        "_turn_seq",
+        "_window",
+        "_entities",
+        "_alias_index",
+        "_session_summary",
+        "_created_at",
+        "_topic_stack",
+        "_ctx_cache",
+        "_ctx_cache_dirty",
+    )
+
     def __init__(
         self,
         session_id: Optional[str] = None,
@@ -71,10 +209,15 @@ class ConversationContext:
         self.max_entities = max_entities
 
         self._turns: list[Turn] = []
+        self._turn_seq: int = 0
+        self._window: deque[Turn] = deque(maxlen=window_size)
         self._entities: dict[str, Entity] = {}
+        self._alias_index: dict[str, str] = {}  # lowercased name/alias -> entity id
         self._session_summary: str = ""
         self._created_at: float = time.time()
         self._topic_stack: list[str] = []  # current conversation topics
+        self._ctx_cache: Optional[dict[str, Any]] = None
+        self._ctx_cache_dirty: bool = True
 
     # ─── Turn Management ──────────────────────────────────────────────
 
@@ -83,14 +226,16 @@ class ConversationContext:
         content: str,
         metadata: Optional[dict[str, Any]] = None,
     ) -> Turn:
-        turn = Turn(
-            id=str(uuid.uuid4()),
+        turn = _acquire_turn(
+            id=self._next_turn_id(),
             role=Role.USER,
             content=content,
             timestamp=time.time(),
-            metadata=metadata or {},
+            metadata=metadata,
         )
         self._turns.append(turn)
+        self._window.append(turn)
+        self._ctx_cache_dirty = True
         return turn
 
     def add_brain_turn(
@@ -100,28 +245,37 @@ class ConversationContext:
         entities: Optional[list[str]] = None,
         metadata: Optional[dict[str, Any]] = None,
     ) -> Turn:
-        turn = Turn(
-            id=str(uuid.uuid4()),
+        turn = _acquire_turn(
+            id=self._next_turn_id(),
             role=Role.BRAIN,
             content=content,
             timestamp=time.time(),
             intent=intent,
-            entities_mentioned=entities or [],
-            metadata=metadata or {},
+            entities_mentioned=entities,
+            metadata=metadata,
         )
         self._turns.append(turn)
+        self._window.append(turn)
+        self._ctx_cache_dirty = True
         return turn
 
     def add_system_turn(self, content: str) -> Turn:
-        turn = Turn(
-            id=str(uuid.uuid4()),
+        turn = _acquire_turn(
+            id=self._next_turn_id(),
             role=Role.SYSTEM,
             content=content,
             timestamp=time.time(),
         )
         self._turns.append(turn)
+        self._window.append(turn)
+        self._ctx_cache_dirty = True
         return turn
 
+    def _next_turn_id(self) -> str:
+        """Session-scoped sequential ID — no urandom syscall per turn."""
+        self._turn_seq += 1
+        return f"{self.session_id[:8]}-{self._turn_seq}"
+
     # ─── Entity Tracking ──────────────────────────────────────────────
 
     def track_entity(
@@ -132,28 +286,39 @@ class ConversationContext:
         metadata: Optional[dict[str, Any]] = None,
     ) -> Entity:
         """Register or update a tracked entity."""
+        self._ctx_cache_dirty = True
         # Check if entity already exists by name or alias
         existing = self.find_entity(canonical_name)
         if existing:
             existing.touch()
             if aliases:
                 for alias in aliases:
-                    if alias.lower() not in [a.lower() for a in existing.aliases]:
+                    a_lower = alias.lower()
+                    if a_lower not in existing._alias_lower:
                         existing.aliases.append(alias)
+                        existing._alias_lower.add(a_lower)
+                        existing._cached_dict = None
+                        self._alias_index[a_lower.strip()] = existing.id
             if metadata:
-                existing.metadata.update(metadata)
+                if existing.metadata is None:
+                    existing.metadata = dict(metadata)
+                else:
+                    existing.metadata.update(metadata)
+                existing._cached_dict = None
             return existing
 
         entity = Entity(
-            id=str(uuid.uuid4()),
+            id=uuid.uuid4().hex,
             canonical_name=canonical_name,
             entity_type=entity_type,
             aliases=aliases or [],
-            metadata=metadata or {},
-            last_referenced_at=time.time(),
+            _alias_lower={a.lower() for a in aliases} if aliases else set(),
+            metadata=metadata or None,
+            last_referenced_at=_clock_ns(),
             reference_count=1,
         )
         self._entities[entity.id] = entity
+        self._index_entity(entity)
 
         # Evict least-recently-referenced entities if over limit
         if len(self._entities) > self.max_entities:
@@ -162,23 +327,29 @@ class ConversationContext:
         return entity
 
     def find_entity(self, name_or_alias: str) -> Optional[Entity]:
-        """Find entity by canonical name or any alias (case-insensitive)."""
-        needle = name_or_alias.lower().strip()
-        for entity in self._entities.values():
-            if entity.canonical_name.lower() == needle:
-                return entity
-            if any(a.lower() == needle for a in entity.aliases):
-                return entity
-        return None
+        """Find entity by canonical name or any alias (case-insensitive, O(1))."""
+        entity_id = self._alias_index.get(name_or_alias.lower().strip())
+        return self._entities.get(entity_id) if entity_id else None
+
+    def _index_entity(self, entity: Entity) -> None:
+        """Register all of an entity's lookup keys in the alias index."""
+        self._alias_index[entity.canonical_name_lower] = entity.id
+        for alias in entity.aliases:
+            self._alias_index[alias.lower().strip()] = entity.id
+
+    def _unindex_entity(self, entity: Entity) -> None:
+        """Remove all index keys owned by an entity (on eviction)."""
+        for key in (entity.canonical_name_lower, *(a.lower().strip() for a in entity.aliases)):
+            if self._alias_index.get(key) == entity.id:
+                del self._alias_index[key]
 
     def get_recent_entities(self, limit: int = 10) -> list[Entity]:
         """Get most recently referenced entities for pronoun resolution."""
-        sorted_entities = sorted(
+        return heapq.nlargest(
+            limit,
             self._entities.values(),
             key=lambda e: e.last_referenced_at,
-            reverse=True,
         )
-        return sorted_entities[:limit]
 
     def get_entities_by_type(self, entity_type: str) -> list[Entity]:
         return [
@@ -188,18 +359,58 @@ class ConversationContext:
         ]
 
     def _evict_stale_entities(self) -> None:
-        sorted_entities = sorted(
+        to_remove = len(self._entities) - self.max_entities
+        stale = heapq.nsmallest(
+            to_remove,
             self._entities.values(),
             key=lambda e: (e.reference_count, e.last_referenced_at),
         )
-        to_remove = len(self._entities) - self.max_entities
-        for entity in sorted_entities[:to_remove]:
+        for entity in stale:
+            self._unindex_entity(entity)
             del self._entities[entity.id]
 
+    _ARCHIVED = "[archived]"
+
+    def evict_old_turns(self) -> int:
+        """
+        Reclaim memory held by turns well outside the active window.
+
+        Turns older than 2x the window keep their place in history (turn
+        count stays meaningful) but have content archived and metadata
+        dropped; consecutive error turns among them collapse to one.
+        Idempotent — safe to run on every compression pass.
+        """
+        cutoff = len(self._turns) - self.window_size * 2
+        if cutoff <= 0:
+            return 0
+        self._ctx_cache_dirty = True
+
+        evicted = 0
+        prev_was_error = False
+        kept: list[Turn] = []
+        for i, turn in enumerate(self._turns):
+            if i >= cutoff:
+                kept.append(turn)
+                continue
+            if turn.intent == "error" and prev_was_error:
+                _release_turn(turn)
+                evicted += 1
+                continue
+            prev_was_error = turn.intent == "error"
+            if turn.content != self._ARCHIVED:
+                turn.content = self._ARCHIVED
+                turn.metadata = None
+                turn._cached_dict = None
+                evicted += 1
+            kept.append(turn)
+        self._turns = kept
+        return evicted
+
     # ─── Topic Stack ──────────────────────────────────────────────────
 
     def push_topic(self, topic: str) -> None:
         if not self._topic_stack or self._topic_stack[-1] != topic:
+            self._ctx_cache_dirty = True
             self._topic_stack.append(topic)
             if len(self._topic_stack) > 20:
                 self._topic_stack = self._topic_stack[-20:]
@@ -208,7 +419,10 @@ class ConversationContext:
         return self._topic_stack[-1] if self._topic_stack else None
 
     def pop_topic(self) -> Optional[str]:
-        return self._topic_stack.pop() if self._topic_stack else None
+        if self._topic_stack:
+            self._ctx_cache_dirty = True
+            return self._topic_stack.pop()
+        return None
 
     # ─── Context Window for Brain ─────────────────────────────────────
 
@@ -217,42 +431,28 @@ class ConversationContext:
         Build the full context payload sent to the OpenClaw brain.
         This is the brain's entire understanding of the conversation.
         """
-        window_turns = self._turns[-self.window_size :]
-        recent_entities = self.get_recent_entities(15)
-
-        return {
-            "session_id": self.session_id,
-            "session_summary": self._session_summary,
-            "current_topic": self.current_topic(),
-            "topic_history": self._topic_stack[-5:],
-            "turns": [
-                {
-                    "role": t.role.value,
-                    "content": t.content,
-                    "timestamp": t.timestamp,
-                    "intent": t.intent,
-                    "entities": t.entities_mentioned,
-                }
-                for t in window_turns
-            ],
-            "tracked_entities": [
-                {
-                    "id": e.id,
-                    "name": e.canonical_name,
-                    "type": e.entity_type,
-                    "aliases": e.aliases,
-                    "metadata": e.metadata,
-                    "ref_count": e.reference_count,
-                }
-                for e in recent_entities
-            ],
-            "turn_count": len(self._turns),
-            "session_age_seconds": time.time() - self._created_at,
-        }
+        if not self._ctx_cache_dirty and self._ctx_cache is not None:
+            ctx = self._ctx_cache.copy()
+            ctx["session_age_seconds"] = time.time() - self._created_at
+            return ctx
+
+        ctx = _BRAIN_CTX_TEMPLATE.copy()
+        ctx["session_id"] = self.session_id
+        ctx["session_summary"] = self._session_summary
+        ctx["current_topic"] = self.current_topic()
+        ctx["topic_history"] = self._topic_stack[-5:]
+        ctx["turns"] = [t.as_dict() for t in self._window]
+        ctx["tracked_entities"] = [e.as_dict() for e in self.get_recent_entities(15)]
+        ctx["turn_count"] = len(self._turns)
+        ctx["session_age_seconds"] = time.time() - self._created_at
+        self._ctx_cache = ctx
+        self._ctx_cache_dirty = False
+        return ctx.copy()
 
     def update_session_summary(self, summary: str) -> None:
         """Called when the brain compresses older context into a summary."""
         self._session_summary = summary
+        self._ctx_cache_dirty = True
 
     # ─── Serialization ────────────────────────────────────────────────
 
@@ -261,15 +461,28 @@ class ConversationContext:
         return len(self._turns)
 
     @property
-    def all_turns(self) -> list[Turn]:
-        return list(self._turns)
+    def all_turns(self) -> tuple[Turn, ...]:
+        """Read-only snapshot of the full turn history."""
+        return tuple(self._turns)
+
+    def iter_turns(self) -> Iterator[Turn]:
+        """Iterate turns without copying the history list."""
+        return iter(self._turns)
+
+    def recycle(self) -> None:
+        """Return this session's turns to the pool. Call only when the
+        context is being discarded and no caller still holds its turns."""
+        for turn in self._turns:
+            _release_turn(turn)
+        self._turns.clear()
+        self._window.clear()
 
     def to_dict(self) -> dict[str, Any]:
-        return {
-            "session_id": self.session_id,
-            "created_at": self._created_at,
-            "turn_count": len(self._turns),
-            "entity_count": len(self._entities),
-            "current_topic": self.current_topic(),
-            "session_summary": self._session_summary,
-        }
+        d = _TO_DICT_TEMPLATE.copy()
+        d["session_id"] = self.session_id
+        d["created_at"] = self._created_at
+        d["turn_count"] = len(self._turns)
+        d["entity_count"] = len(self._entities)
+        d["current_topic"] = self.current_topic()
+        d["session_summary"] = self._session_summary
+        return d
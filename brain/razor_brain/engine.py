@@ -11,6 +11,7 @@ Zero hardcoded commands. The brain handles all understanding.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import time
@@ -20,14 +21,24 @@ from typing import Any, Callable, Optional
 from razor_brain.context import ConversationContext, Entity, Role
 from razor_brain.gateway import GatewayConfig, OpenClawGateway
 from razor_brain.prompts import build_brain_payload
-from razor_brain.state import ConversationState, StateTracker
+from razor_brain.state import STATE_BY_VALUE, ConversationState, StateTracker
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional — fall back to stdlib
+    _json_loads = json.loads
 
 logger = logging.getLogger("razor.engine")
 
+# Responses above this size are parsed off the event loop.
+_LARGE_CONTENT_BYTES = 16 * 1024
+
 
 # ─── Response Model ───────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class BrainResponse:
     """Parsed response from the OpenClaw brain."""
 
@@ -52,7 +63,7 @@ class BrainResponse:
         # Handle the case where content is a JSON string
         if isinstance(content, str):
             try:
-                content = json.loads(content)
+                content = _json_loads(content)
             except json.JSONDecodeError:
                 # Plain text response — wrap it
                 return cls(
@@ -61,13 +72,13 @@ class BrainResponse:
                     latency_ms=latency_ms,
                 )
 
-        # Map inferred_state string to enum
+        # Map inferred_state string to enum — precomputed dict lookup,
+        # no Enum value-resolution machinery per response
         state = None
         raw_state = content.get("inferred_state")
         if raw_state:
-            try:
-                state = ConversationState(raw_state)
-            except ValueError:
+            state = STATE_BY_VALUE.get(raw_state)
+            if state is None:
                 logger.warning("Unknown state from brain: %s", raw_state)
 
         return cls(
@@ -96,7 +107,7 @@ class BrainResponse:
 
 # ─── Engine Configuration ────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class EngineConfig:
     """Configuration for the conversation engine."""
 
@@ -139,6 +150,7 @@ class ConversationEngine:
 
         self._started = False
         self._processing = False
+        self._prompt_sent = False  # default prompt already sent this session
 
     # ─── Lifecycle ────────────────────────────────────────────────────
 
@@ -212,6 +224,7 @@ class ConversationEngine:
                 context=brain_context,
                 system_prompt_override=self.config.system_prompt_override,
                 user_profile=self.config.user_profile,
+                prompt_sent=self._prompt_sent,
             )
 
             # ④ Send to the brain via gateway
@@ -220,16 +233,26 @@ class ConversationEngine:
                 timeout=self.config.response_timeout,
                 stream_callback=stream_callback,
             )
+            self._prompt_sent = True
 
-            # ⑤ Parse the response
+            # ⑤ Parse the response (large payloads parse off the event loop)
             latency_ms = (time.time() - start_time) * 1000
-            response = BrainResponse.from_gateway_response(raw_response, latency_ms)
+            content = raw_response.get("content")
+            if isinstance(content, str) and len(content) > _LARGE_CONTENT_BYTES:
+                response = await asyncio.to_thread(
+                    BrainResponse.from_gateway_response, raw_response, latency_ms
+                )
+            else:
+                response = BrainResponse.from_gateway_response(raw_response, latency_ms)
+
+            # ⑥ Track entities the brain detected and collect their names
+            entity_names = self._process_entities(response.entities)
 
-            # ⑥ Update context with brain's response
+            # ⑦ Update context with brain's response
             brain_turn = self.context.add_brain_turn(
                 content=response.text,
                 intent=response.intent,
-                entities=[e.get("name", "") for e in response.entities],
+                entities=entity_names,
                 metadata={
                     "confidence": response.confidence,
                     "latency_ms": response.latency_ms,
@@ -237,9 +260,6 @@ class ConversationEngine:
                 },
             )
 
-            # ⑦ Track entities the brain detected
-            self._process_entities(response.entities)
-
             # ⑧ Update conversation state
             if response.state:
                 self.state.transition(
@@ -324,22 +344,25 @@ class ConversationEngine:
 
     # ─── Entity Processing ────────────────────────────────────────────
 
-    def _process_entities(self, entities: list[dict[str, Any]]) -> None:
-        """Register entities the brain detected in the latest exchange."""
+    def _process_entities(self, entities: list[dict[str, Any]]) -> list[str]:
+        """Register entities the brain detected; return their names in order."""
+        names: list[str] = []
         for entity_data in entities:
             name = entity_data.get("name")
             if not name:
                 continue
+            names.append(name)
             self.context.track_entity(
                 canonical_name=name,
-                entity_type=entity_data.get("type", "other"),
-                aliases=entity_data.get("aliases", []),
+                entity_type=entity_data.get("type") or "other",
+                aliases=entity_data.get("aliases") or [],
                 metadata={
                     k: v
                     for k, v in entity_data.items()
                     if k not in ("name", "type", "aliases")
                 },
             )
+        return names
 
     # ─── Context Compression ─────────────────────────────────────────
 
@@ -355,6 +378,10 @@ class ConversationEngine:
         if self.context.turn_count % 10 != 0:
             return
 
+        evicted = self.context.evict_old_turns()
+        if evicted:
+            logger.debug("Evicted/archived %d old turns", evicted)
+
         logger.info("Requesting context compression from brain")
 
         compress_payload = {
@@ -385,11 +412,13 @@ class ConversationEngine:
     def new_session(self) -> str:
         """Start a fresh conversation session, preserving entity knowledge."""
         old_session = self.context.session_id
+        self.context.recycle()
         self.context = ConversationContext(
             window_size=self.config.context_window_size,
             max_entities=self.config.max_entities,
         )
         self.state = StateTracker()
+        self._prompt_sent = False
         logger.info(
             "New session %s (replaced %s)",
             self.context.session_id,
@@ -5,7 +5,31 @@ from dataclasses import dataclass, field
 from typing import Optional
 import re
 
-@dataclass
+# Precompiled patterns — store_from_response/resolve_reference run per turn.
+_INCLUDING_RE = re.compile(r'including\s+(.+?)(?:\.|$)')
+_FIRST_TOKEN_RE = re.compile(r'^([^,]+)')
+
+# Follow-up reference words, resolved in a single scan. Longer phrases
+# come first so the alternation prefers "that deal" over bare pronouns.
+_REF_RE = re.compile(
+    r'\b(that deal|the deal|that one|the one'
+    r'|first|1st|second|2nd|third|3rd|fourth|4th|fifth|5th'
+    r'|her|him|them)\b'
+)
+
+# matched word -> (lookup kind, argument)
+_REF_DISPATCH = {
+    "first": ("ordinal", 1), "1st": ("ordinal", 1),
+    "second": ("ordinal", 2), "2nd": ("ordinal", 2),
+    "third": ("ordinal", 3), "3rd": ("ordinal", 3),
+    "fourth": ("ordinal", 4), "4th": ("ordinal", 4),
+    "fifth": ("ordinal", 5), "5th": ("ordinal", 5),
+    "her": ("person", 1), "him": ("person", 1), "them": ("person", 1),
+    "that one": ("person", 1), "the one": ("person", 1),
+    "that deal": ("deal", 1), "the deal": ("deal", 1),
+}
+
+@dataclass(slots=True)
 class TrackedEntity:
     name: str
     type: str  # person, company, deal
@@ -32,7 +56,7 @@ class EntityMemory:
         # Extract names from common patterns
         if action in ("get_hot_leads", "get_email_opens", "get_email_clicks", "get_replies"):
             # Pattern: "including Name1, Name2, Name3"
-            match = re.search(r'including\s+(.+?)(?:\.|$)', response_text)
+            match = _INCLUDING_RE.search(response_text)
             if match:
                 names = [n.strip() for n in match.group(1).split(',')]
                 for i, name in enumerate(names):
@@ -52,7 +76,7 @@ class EntityMemory:
                     ))
         
         elif action == "get_stale_deals":
-            match = re.search(r'including\s+(.+?)(?:\.|$)', response_text)
+            match = _INCLUDING_RE.search(response_text)
             if match:
                 names = [n.strip() for n in match.group(1).split(',')]
                 for i, name in enumerate(names):
@@ -62,7 +86,7 @@ class EntityMemory:
         
         elif action == "lookup_contact":
             # First result is primary
-            match = re.search(r'^([^,]+)', response_text)
+            match = _FIRST_TOKEN_RE.search(response_text)
             if match:
                 self.entities.append(TrackedEntity(
                     name=match.group(1).strip(), type="person", position=1
@@ -70,32 +94,17 @@ class EntityMemory:
     
     def resolve_reference(self, query: str) -> Optional[TrackedEntity]:
         """Resolve 'first one', 'call her', 'that deal' to an entity."""
-        q = query.lower()
-        
-        # Ordinal references
-        ordinals = {
-            "first": 1, "1st": 1, "second": 2, "2nd": 2,
-            "third": 3, "3rd": 3, "fourth": 4, "4th": 4, "fifth": 5, "5th": 5
-        }
-        
-        for word, pos in ordinals.items():
-            if word in q:
-                for e in self.entities:
-                    if e.position == pos:
-                        return e
-        
-        # Pronoun references (her/him/them → first person entity)
-        if any(p in q for p in ["her", "him", "them", "that one", "the one"]):
-            for e in self.entities:
-                if e.type == "person" and e.position == 1:
-                    return e
-        
-        # "that deal" → first deal entity
-        if "that deal" in q or "the deal" in q:
-            for e in self.entities:
-                if e.type == "deal" and e.position == 1:
+        match = _REF_RE.search(query.lower())
+        if not match:
+            return None
+
+        kind, pos = _REF_DISPATCH[match.group(1)]
+        for e in self.entities:
+            if kind == "ordinal":
+                if e.position == pos:
                     return e
-        
+            elif e.type == kind and e.position == pos:
+                return e
         return None
 
 # Global instance
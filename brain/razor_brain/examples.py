@@ -184,6 +184,15 @@ async def example_with_callbacks():
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 if __name__ == "__main__":
+    # uvloop gives the gateway a libuv-backed C event loop — strongly
+    # recommended for production voice latency, optional for dev.
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     print("=" * 60)
     print("Razor Brain — Integration Examples")
     print("=" * 60)
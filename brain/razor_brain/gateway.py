@@ -11,17 +11,63 @@ import asyncio
 import json
 import logging
 import time
-import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Callable, Optional
 
-import websockets
 import websockets.exceptions
+from websockets.asyncio.client import ClientConnection
+from websockets.asyncio.client import connect as ws_connect
+
+# Serializer preference: msgspec (reusable encoder/decoder, fastest on
+# the brain's structured frames) > orjson > stdlib. Both accelerators are
+# optional; the wire format is identical either way.
+try:
+    import msgspec.json
+
+    _msgspec_encoder = msgspec.json.Encoder(enc_hook=str)
+    _msgspec_decoder = msgspec.json.Decoder()
+
+    def _json_dumps(obj: Any) -> bytes:
+        return _msgspec_encoder.encode(obj)
+
+    _json_loads = _msgspec_decoder.decode
+except ImportError:
+    try:
+        import orjson
+
+        def _json_dumps(obj: Any) -> bytes:
+            return orjson.dumps(obj, default=str)
+
+        _json_loads = orjson.loads
+    except ImportError:  # fall back to stdlib
+
+        def _json_dumps(obj: Any) -> bytes:
+            return json.dumps(obj, default=str).encode()
+
+        _json_loads = json.loads
 
 logger = logging.getLogger("razor.gateway")
 
 
+def _frame_message(request_id: int, payload: dict[str, Any]) -> bytes:
+    """Serialize the envelope by splicing a tiny header onto the payload
+    bytes — avoids copying every payload key into a fresh message dict.
+
+    The body is appended through a memoryview so the payload bytes are
+    copied exactly once (into the frame) instead of twice via an
+    intermediate slice.
+    """
+    body = _json_dumps(payload)
+    if len(body) <= 2:  # "{}" — no keys to splice; comma would be invalid
+        return b'{"request_id":%d,"type":"conversation"}' % request_id
+    frame = bytearray(b'{"request_id":%d,"type":"conversation",' % request_id)
+    frame += memoryview(body)[1:]
+    return bytes(frame)
+
+
 class GatewayStatus(str, Enum):
     DISCONNECTED = "disconnected"
     CONNECTING = "connecting"
@@ -30,30 +76,49 @@ class GatewayStatus(str, Enum):
     FATAL = "fatal"
 
 
-@dataclass
+@dataclass(slots=True)
 class GatewayConfig:
-    """Configuration for the OpenClaw gateway connection."""
+    """
+    Configuration for the OpenClaw gateway connection.
+
+    Liveness comes from the WebSocket layer: ``ping_interval`` /
+    ``ping_timeout`` drive the library's own keepalive, and a failed ping
+    closes the connection, which the read loop turns into a reconnect.
+
+    Production note: run the process under uvloop (``import uvloop;
+    uvloop.install()`` before ``asyncio.run``) — the reader loop, writer
+    futures, and reconnect tasks all benefit from the C event loop. On
+    Python 3.12+ the gateway also enables the asyncio eager task factory.
+    """
 
     uri: str = "ws://127.0.0.1:18789"
     reconnect_delay_base: float = 1.0        # base seconds between retries
     reconnect_delay_max: float = 30.0         # max backoff
     reconnect_max_attempts: int = 50          # 0 = infinite
-    ping_interval: float = 20.0               # WebSocket ping interval
-    ping_timeout: float = 10.0                # ping response timeout
+    ping_interval: float = 20.0               # WS-layer keepalive ping interval
+    ping_timeout: float = 10.0                # ping response timeout (liveness)
     response_timeout: float = 60.0            # max wait for brain response
     max_message_size: int = 10 * 1024 * 1024  # 10 MB
     connect_timeout: float = 10.0
+    outbox_maxsize: int = 64                  # outbound queue backpressure bound
+    compress_loopback: bool = False           # permessage-deflate on loopback links
+    max_recv_queue: int = 32                  # reader buffer bound (backpressure)
+    stream_coalesce_ms: float = 20.0          # merge stream chunks for this long
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingRequest:
     """A message awaiting a response from the brain."""
 
-    request_id: str
-    payload: dict[str, Any]
+    request_id: int
+    frame: bytes  # pre-serialized outbound frame, reused on reconnect re-send
     future: asyncio.Future
-    sent_at: float = field(default_factory=time.time)
+    sent_at: float = field(default_factory=time.monotonic)  # monotonic clock
     timeout: float = 60.0
+    stream_callback: Optional[Callable] = None
+    stream_buf: list[str] = field(default_factory=list, repr=False)
+    flush_handle: Optional[asyncio.TimerHandle] = field(default=None, repr=False)
+    timer: Optional[asyncio.TimerHandle] = field(default=None, repr=False)
 
 
 class OpenClawGateway:
@@ -66,11 +131,11 @@ class OpenClawGateway:
 
     def __init__(self, config: Optional[GatewayConfig] = None) -> None:
         self.config = config or GatewayConfig()
-        self._ws: Optional[websockets.WebSocketClientProtocol] = None
+        self._ws: Optional[ClientConnection] = None
         self._status = GatewayStatus.DISCONNECTED
         self._reconnect_attempt = 0
-        self._pending: dict[str, PendingRequest] = {}
-        self._stream_callbacks: dict[str, Callable] = {}
+        self._pending: dict[int, PendingRequest] = {}
+        self._next_request_id = 0  # monotonic — connection is single-peer
         self._status_listeners: list[Callable] = []
 
         # Health metrics
@@ -78,12 +143,28 @@ class OpenClawGateway:
         self._messages_received = 0
         self._last_send_at: Optional[float] = None
         self._last_recv_at: Optional[float] = None
-        self._total_latency = 0.0
+        self._ewma_latency = 0.0          # drift-sensitive running average
+        self._ewma_alpha = 0.1
         self._latency_samples = 0
+        self._latency_window: deque[float] = deque(maxlen=128)  # for p50/p95
+
+        # Outbound queue — all frames go through one writer coroutine
+        self._outbox: Optional[asyncio.Queue[bytes]] = None
+
+        # Off-loop serializer for oversized payloads (see send())
+        self._json_executor: Optional[ThreadPoolExecutor] = None
+
+        # Inbound routing fixed at bind time — one dict probe per frame
+        # instead of a type-check chain in the hot dispatch path.
+        self._handlers: dict[str, Callable[[dict[str, Any]], None]] = {
+            "stream_chunk": self._on_stream_chunk,
+            "stream_end": self._on_response,
+            "response": self._on_response,
+        }
 
         # Background tasks
         self._reader_task: Optional[asyncio.Task] = None
-        self._health_task: Optional[asyncio.Task] = None
+        self._writer_task: Optional[asyncio.Task] = None
 
     # ─── Connection Lifecycle ─────────────────────────────────────────
 
@@ -94,13 +175,41 @@ class OpenClawGateway:
 
         self._set_status(GatewayStatus.CONNECTING)
 
+        # A dropped connection cancels nothing by itself: the reader dies
+        # with the socket, but a previous writer stays parked on
+        # outbox.get() and would compete with the new one for frames —
+        # cancel both so the single-writer invariant survives reconnects.
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
+
+        # Eager tasks (3.12+) let coroutines that finish without suspending
+        # skip a scheduler round-trip — reconnect no-ops and short reads.
+        loop = asyncio.get_running_loop()
+        if hasattr(asyncio, "eager_task_factory"):
+            loop.set_task_factory(asyncio.eager_task_factory)
+
+        # permessage-deflate is pure CPU overhead on a loopback link —
+        # the payloads are small JSON and bandwidth is free.
+        loopback = self.config.uri.startswith(("ws://127.", "ws://localhost"))
+        compression = (
+            "deflate" if (not loopback or self.config.compress_loopback) else None
+        )
+
         try:
+            # The asyncio-native client sends bytes frames without the
+            # str→UTF-8 round-trip of the legacy protocol, so orjson's
+            # bytes output flows straight into the socket.
             self._ws = await asyncio.wait_for(
-                websockets.connect(
+                ws_connect(
                     self.config.uri,
                     ping_interval=self.config.ping_interval,
                     ping_timeout=self.config.ping_timeout,
                     max_size=self.config.max_message_size,
+                    max_queue=self.config.max_recv_queue,
+                    write_limit=2**20,
+                    compression=compression,
                     close_timeout=5.0,
                 ),
                 timeout=self.config.connect_timeout,
@@ -109,9 +218,15 @@ class OpenClawGateway:
             self._reconnect_attempt = 0
             logger.info("Connected to OpenClaw gateway at %s", self.config.uri)
 
-            # Start background reader
+            # Start background reader and single writer
+            if self._outbox is None:
+                self._outbox = asyncio.Queue(maxsize=self.config.outbox_maxsize)
+            if self._json_executor is None:
+                self._json_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="gateway-json"
+                )
             self._reader_task = asyncio.create_task(self._read_loop())
-            self._health_task = asyncio.create_task(self._health_loop())
+            self._writer_task = asyncio.create_task(self._write_loop())
 
         except (
             OSError,
@@ -128,8 +243,8 @@ class OpenClawGateway:
         """Gracefully close the gateway connection."""
         if self._reader_task and not self._reader_task.done():
             self._reader_task.cancel()
-        if self._health_task and not self._health_task.done():
-            self._health_task.cancel()
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
 
         if self._ws:
             try:
@@ -189,11 +304,19 @@ class OpenClawGateway:
                 await self.connect()
                 logger.info("Reconnected successfully on attempt %d", self._reconnect_attempt)
 
-                # Re-send any pending requests that haven't timed out
-                now = time.time()
-                for req in list(self._pending.values()):
-                    if now - req.sent_at < req.timeout and not req.future.done():
-                        await self._raw_send(req.payload)
+                # Re-send any pending requests that haven't timed out.
+                # Frames were serialized at first send — batch-enqueue them
+                # in bounded chunks instead of one await per request.
+                now = time.monotonic()
+                alive = [
+                    req
+                    for req in self._pending.values()
+                    if now - req.sent_at < req.timeout and not req.future.done()
+                ]
+                for i in range(0, len(alive), 32):
+                    await asyncio.gather(
+                        *(self._raw_send(req.frame) for req in alive[i : i + 32])
+                    )
 
                 return
             except ConnectionError:
@@ -225,71 +348,105 @@ class OpenClawGateway:
         if self._status != GatewayStatus.CONNECTED:
             await self.connect()
 
-        request_id = str(uuid.uuid4())
+        self._next_request_id += 1
+        request_id = self._next_request_id
         timeout = timeout or self.config.response_timeout
 
-        message = {
-            "request_id": request_id,
-            "type": "conversation",
-            **payload,
-        }
-
         loop = asyncio.get_running_loop()
+
+        # Serializing a very large context inline would stall the event
+        # loop (and the read loop draining stream chunks with it), so big
+        # payloads encode on the dedicated serializer thread. Compressed
+        # contexts stay small, so the inline fast path is the norm.
+        turns = (payload.get("context") or {}).get("turns") or ()
+        if len(turns) > 50 and self._json_executor is not None:
+            frame = await loop.run_in_executor(
+                self._json_executor, _frame_message, request_id, payload
+            )
+        else:
+            frame = _frame_message(request_id, payload)
         future: asyncio.Future[dict[str, Any]] = loop.create_future()
 
         pending = PendingRequest(
             request_id=request_id,
-            payload=message,
+            frame=frame,
             future=future,
             timeout=timeout,
+            stream_callback=stream_callback,
         )
         self._pending[request_id] = pending
 
-        if stream_callback:
-            self._stream_callbacks[request_id] = stream_callback
-
         try:
-            await self._raw_send(message)
-            result = await asyncio.wait_for(future, timeout=timeout)
-            return result
-        except asyncio.TimeoutError:
-            logger.warning("Brain response timed out for request %s", request_id)
-            raise TimeoutError(
-                f"Brain did not respond within {timeout}s"
+            await self._raw_send(frame)
+            # Timeout via call_later directly on the future — avoids the
+            # wrapper task asyncio.wait_for would spawn per request.
+            pending.timer = loop.call_later(
+                timeout, self._timeout_request, request_id
             )
+            return await future
+        except TimeoutError:
+            logger.warning("Brain response timed out for request %s", request_id)
+            raise
         finally:
+            if pending.timer is not None:
+                pending.timer.cancel()
             self._pending.pop(request_id, None)
-            self._stream_callbacks.pop(request_id, None)
 
-    async def _raw_send(self, message: dict[str, Any]) -> None:
-        """Send a raw JSON message over the WebSocket."""
-        if not self._ws:
-            raise ConnectionError("WebSocket not connected")
+    async def _raw_send(self, data: bytes) -> None:
+        """Enqueue a pre-serialized frame for the writer coroutine.
 
-        data = json.dumps(message, default=str)
+        The bounded queue applies backpressure when the brain is slow.
+        """
+        if not self._ws or self._outbox is None:
+            raise ConnectionError("WebSocket not connected")
+        await self._outbox.put(data)
+
+    async def _write_loop(self) -> None:
+        """Single writer — drains the outbox so concurrent senders never
+        contend on the WebSocket's internal lock."""
+        # Bind the socket this writer was spawned for: a stale writer
+        # waking mid-reconnect must not touch self._ws, which may be
+        # None or already belong to the replacement connection.
+        ws = self._ws
+        if ws is None:
+            return
         try:
-            await self._ws.send(data)
-            self._messages_sent += 1
-            self._last_send_at = time.time()
-        except websockets.exceptions.ConnectionClosed:
-            logger.warning("Connection lost during send, initiating reconnect")
-            asyncio.create_task(self._reconnect())
-            raise ConnectionError("Connection lost during send")
+            while True:
+                data = await self._outbox.get()
+                try:
+                    await ws.send(data)
+                    self._messages_sent += 1
+                    self._last_send_at = time.time()
+                except websockets.exceptions.ConnectionClosed:
+                    logger.warning("Connection lost during send, initiating reconnect")
+                    if self._status != GatewayStatus.DISCONNECTED:
+                        asyncio.create_task(self._reconnect())
+                    return
+        except asyncio.CancelledError:
+            return
 
     async def _read_loop(self) -> None:
         """Background task that reads all messages from the gateway."""
+        # Hoist hot lookups out of the per-frame loop
+        loads = _json_loads
+        dispatch = self._dispatch
         try:
             async for raw in self._ws:
                 self._messages_received += 1
                 self._last_recv_at = time.time()
 
+                # Cheap reject before paying for a parse + exception
+                if not raw or raw[:1] not in (b"{", "{"):
+                    logger.warning("Received non-JSON from gateway: %s", raw[:200])
+                    continue
+
                 try:
-                    message = json.loads(raw)
-                except json.JSONDecodeError:
+                    message = loads(raw)
+                except ValueError:
                     logger.warning("Received non-JSON from gateway: %s", raw[:200])
                     continue
 
-                await self._dispatch(message)
+                await dispatch(message)
 
         except websockets.exceptions.ConnectionClosed as exc:
             logger.warning("Gateway connection closed: %s", exc)
@@ -304,59 +461,102 @@ class OpenClawGateway:
 
     async def _dispatch(self, message: dict[str, Any]) -> None:
         """Route an incoming gateway message to the correct handler."""
-        request_id = message.get("request_id")
-        msg_type = message.get("type", "response")
+        handler = self._handlers.get(message.get("type", "response"))
+        if handler is not None:
+            handler(message)
+        else:
+            logger.debug("Unsolicited gateway message: %s", message.get("type"))
 
-        if msg_type == "stream_chunk" and request_id in self._stream_callbacks:
-            chunk = message.get("content", "")
+    def _lookup_pending(self, message: dict[str, Any]) -> Optional[PendingRequest]:
+        """Resolve the pending request a message belongs to, if any."""
+        request_id = message.get("request_id")
+        if request_id is None:
+            return None
+        if not isinstance(request_id, int):
             try:
-                self._stream_callbacks[request_id](chunk)
-            except Exception:
-                pass
+                request_id = int(request_id)
+            except (TypeError, ValueError):
+                return None
+        return self._pending.get(request_id)
+
+    def _on_stream_chunk(self, message: dict[str, Any]) -> None:
+        pending = self._lookup_pending(message)
+        if pending is None or pending.stream_callback is None:
+            return
+        chunk = message.get("content", "")
+        if not isinstance(chunk, str):
+            # Well-formed frame, malformed field (null, number) — skip
+            # the chunk rather than letting an AttributeError escape into
+            # the read loop and tear down the whole connection.
+            logger.warning("Non-string stream chunk content: %r", chunk)
             return
+        pending.stream_buf.append(chunk)
+        # Flush at sentence boundaries so TTS can start speaking;
+        # otherwise coalesce briefly to amortize callback overhead.
+        if chunk.endswith((".", "!", "?")):
+            if pending.flush_handle is not None:
+                pending.flush_handle.cancel()
+                pending.flush_handle = None
+            self._flush_stream(pending)
+        elif pending.flush_handle is None:
+            pending.flush_handle = asyncio.get_running_loop().call_later(
+                self.config.stream_coalesce_ms / 1000.0,
+                self._flush_stream,
+                pending,
+            )
 
-        if msg_type == "stream_end":
-            # Stream finished — resolve with the accumulated response
-            # The final payload contains the full response
-            pass  # Fall through to resolve the future
-
-        if request_id and request_id in self._pending:
-            pending = self._pending[request_id]
-            if not pending.future.done():
-                # Track latency
-                latency = time.time() - pending.sent_at
-                self._total_latency += latency
-                self._latency_samples += 1
-
-                if message.get("error"):
-                    pending.future.set_exception(
-                        RuntimeError(
-                            f"Brain error: {message['error']}"
-                        )
-                    )
-                else:
-                    pending.future.set_result(message)
-        else:
+    def _on_response(self, message: dict[str, Any]) -> None:
+        """Resolve a completed request (final response or stream_end)."""
+        pending = self._lookup_pending(message)
+        if pending is None:
             # Unsolicited message (could be a push notification from brain)
-            logger.debug("Unsolicited gateway message: %s", msg_type)
+            logger.debug("Unsolicited gateway message: %s", message.get("type"))
+            return
 
-    # ─── Health Monitoring ────────────────────────────────────────────
+        # Deliver any coalesced tail before resolving
+        if pending.flush_handle is not None:
+            pending.flush_handle.cancel()
+            pending.flush_handle = None
+        if pending.stream_buf:
+            self._flush_stream(pending)
+        if not pending.future.done():
+            # Track latency (monotonic — immune to clock steps)
+            latency = time.monotonic() - pending.sent_at
+            if self._latency_samples:
+                self._ewma_latency += self._ewma_alpha * (latency - self._ewma_latency)
+            else:
+                self._ewma_latency = latency
+            self._latency_samples += 1
+            self._latency_window.append(latency)
+
+            if message.get("error"):
+                pending.future.set_exception(
+                    RuntimeError(
+                        f"Brain error: {message['error']}"
+                    )
+                )
+            else:
+                pending.future.set_result(message)
+
+    def _timeout_request(self, request_id: int) -> None:
+        """Timer callback — fail a pending request that never got a reply."""
+        pending = self._pending.pop(request_id, None)
+        if pending is not None and not pending.future.done():
+            pending.future.set_exception(
+                TimeoutError(f"Brain did not respond within {pending.timeout}s")
+            )
 
-    async def _health_loop(self) -> None:
-        """Periodic health check."""
-        try:
-            while True:
-                await asyncio.sleep(30)
-                if self._ws and self._status == GatewayStatus.CONNECTED:
-                    try:
-                        pong = await self._ws.ping()
-                        await asyncio.wait_for(pong, timeout=5.0)
-                    except (asyncio.TimeoutError, Exception):
-                        logger.warning("Health ping failed, reconnecting")
-                        asyncio.create_task(self._reconnect())
-                        return
-        except asyncio.CancelledError:
+    def _flush_stream(self, pending: PendingRequest) -> None:
+        """Deliver buffered stream chunks as one merged callback call."""
+        pending.flush_handle = None
+        if not pending.stream_buf:
             return
+        merged = "".join(pending.stream_buf)
+        pending.stream_buf.clear()
+        try:
+            pending.stream_callback(merged)
+        except Exception:
+            pass
 
     # ─── Status ───────────────────────────────────────────────────────
 
@@ -384,9 +584,14 @@ class OpenClawGateway:
 
     @property
     def avg_latency(self) -> float:
-        if self._latency_samples == 0:
+        """EWMA of response latency (seconds) — tracks drift, not lifetime mean."""
+        return self._ewma_latency
+
+    def _latency_percentile(self, q: float) -> float:
+        if not self._latency_window:
             return 0.0
-        return self._total_latency / self._latency_samples
+        ordered = sorted(self._latency_window)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
 
     def health_report(self) -> dict[str, Any]:
         return {
@@ -396,6 +601,8 @@ class OpenClawGateway:
             "messages_received": self._messages_received,
             "pending_requests": len(self._pending),
             "avg_latency_ms": round(self.avg_latency * 1000, 2),
+            "p50_latency_ms": round(self._latency_percentile(0.50) * 1000, 2),
+            "p95_latency_ms": round(self._latency_percentile(0.95) * 1000, 2),
             "reconnect_attempts": self._reconnect_attempt,
             "last_send": self._last_send_at,
             "last_recv": self._last_recv_at,
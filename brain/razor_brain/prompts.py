@@ -7,6 +7,7 @@ so it knows how to handle Razor conversations.
 
 from __future__ import annotations
 
+import hashlib
 from typing import Any
 
 BRAIN_SYSTEM_PROMPT = """\
@@ -73,11 +74,48 @@ You MUST respond with valid JSON only. Structure:
 """
 
 
+# Stable fingerprint of the default prompt — lets the brain cache it and
+# lets repeat turns reference it instead of resending multi-KB of text.
+BRAIN_SYSTEM_PROMPT_HASH = hashlib.blake2b(
+    BRAIN_SYSTEM_PROMPT.encode(), digest_size=8
+).hexdigest()
+
+
+def compress_context(
+    context: dict[str, Any],
+    window: int = 15,
+    overlap: int = 3,
+) -> dict[str, Any]:
+    """
+    Cap the payload's turn list to a sliding window.
+
+    Keeps the last ``window`` turns verbatim; everything older collapses
+    into a single summary memory slot so the serialized frame stays a
+    constant size regardless of session length. The ``overlap`` slack
+    avoids re-cutting the window on every single turn.
+    """
+    turns = context.get("turns") or []
+    if len(turns) <= window + overlap:
+        return context
+
+    compressed = dict(context)
+    compressed["turns"] = turns[-window:]
+    compressed["memory_slots"] = [
+        {
+            "type": "summary",
+            "content": context.get("session_summary") or "",
+            "covers_turns": len(turns) - window,
+        }
+    ]
+    return compressed
+
+
 def build_brain_payload(
     user_message: str,
     context: dict[str, Any],
     system_prompt_override: str | None = None,
     user_profile: dict[str, Any] | None = None,
+    prompt_sent: bool = False,
 ) -> dict[str, Any]:
     """
     Build the complete payload for the OpenClaw brain.
@@ -87,15 +125,23 @@ def build_brain_payload(
         context: The full context from ConversationContext.get_brain_context().
         system_prompt_override: Optional custom system prompt.
         user_profile: Optional user profile (name, company, preferences).
+        prompt_sent: True once the default prompt has gone out this
+            session — later turns send only its hash reference.
 
     Returns:
         Complete payload dict ready to send over WebSocket.
     """
-    payload = {
-        "system_prompt": system_prompt_override or BRAIN_SYSTEM_PROMPT,
-        "user_message": user_message,
-        "context": context,
-    }
+    if system_prompt_override:
+        payload: dict[str, Any] = {"system_prompt": system_prompt_override}
+    elif prompt_sent:
+        payload = {"system_prompt_ref": BRAIN_SYSTEM_PROMPT_HASH}
+    else:
+        payload = {
+            "system_prompt": BRAIN_SYSTEM_PROMPT,
+            "system_prompt_hash": BRAIN_SYSTEM_PROMPT_HASH,
+        }
+    payload["user_message"] = user_message
+    payload["context"] = compress_context(context)
     if user_profile:
         payload["user_profile"] = user_profile
     return payload
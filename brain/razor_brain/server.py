@@ -14,14 +14,20 @@ Architecture:
 from __future__ import annotations
 
 import asyncio
+import functools
+import itertools
 import json
 import logging
 import os
+import queue
+import secrets
 import time
-import uuid
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 from typing import Any, Optional
 
+import httpx
 from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
@@ -42,17 +48,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger("razor.brain")
 
-logger.info(f"Loaded .env from: {env_path}, success: {loaded}")
+# IDs are correlation handles, not secrets — a per-process random nonce
+# plus a counter is unique enough and skips the 16-byte urandom read and
+# UUID object construction that uuid4 pays per call.
+_ID_NONCE = secrets.token_hex(3)
+_id_seq = itertools.count()
+
+
+def _next_id(prefix: str) -> str:
+    return f"{prefix}_{_ID_NONCE}{next(_id_seq):08x}"
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson is optional — fall back to stdlib
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+
+async def _ws_send(websocket: WebSocket, payload: dict) -> None:
+    """Serialize and send one WebSocket payload.
+
+    Bypasses Starlette's send_json (pure-Python json.dumps per frame) in
+    favor of orjson bytes straight into send_bytes.
+    """
+    await websocket.send_bytes(_json_dumps(payload))
+
+logger.info("Loaded .env from: %s, success: %s", env_path, loaded)
 
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 if not ANTHROPIC_API_KEY:
     logger.warning("ANTHROPIC_API_KEY not set — brain will fail at runtime")
 else:
-    logger.info(f"ANTHROPIC_API_KEY loaded (length: {len(ANTHROPIC_API_KEY)}, first 10 chars: {ANTHROPIC_API_KEY[:10]}...)")
+    logger.info(
+        "ANTHROPIC_API_KEY loaded (length: %d, first 10 chars: %s...)",
+        len(ANTHROPIC_API_KEY), ANTHROPIC_API_KEY[:10],
+    )
 
 ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL", "")
 if ANTHROPIC_BASE_URL:
-    logger.info(f"Using custom base URL: {ANTHROPIC_BASE_URL}")
+    logger.info("Using custom base URL: %s", ANTHROPIC_BASE_URL)
 
 MODEL_NAME = "claude-sonnet-4-20250514"
 MAX_TOKENS = 75
@@ -70,6 +109,17 @@ except FileNotFoundError:
     logger.error("SYSTEM_PROMPT.md not found at %s — using fallback", _prompt_path)
     SALES_COACH_SYSTEM_PROMPT = "You are Razor, a sharp AI sales coach. Be concise (max 2 sentences). Respond in JSON: {\"text\":\"...\",\"intent\":\"...\",\"entities\":[],\"actions\":[],\"state\":\"...\",\"confidence\":0.9}"
 
+# Content-block form with prompt caching: Anthropic caches the prompt
+# prefix server-side, so repeat requests skip re-processing the multi-KB
+# prompt — lower TTFB and cheaper input tokens within the cache TTL.
+SALES_COACH_SYSTEM_PROMPT_BLOCKS = [
+    {
+        "type": "text",
+        "text": SALES_COACH_SYSTEM_PROMPT,
+        "cache_control": {"type": "ephemeral"},
+    }
+]
+
 # ─── Quick Response Cache ────────────────────────────────────────────
 # Instant responses for common queries — bypasses Claude API entirely.
 # Keys are lowercase stripped. Value is a partial BrainResponse dict.
@@ -99,10 +149,31 @@ QUICK_RESPONSES: dict[str, dict] = {
 }
 
 
+# One-pass strip of trailing punctuation during key normalization
+_PUNCT_TABLE = str.maketrans("", "", ".,!?")
+
+# Template field sets for quick responses, built once — the hit path
+# combines one with model_construct and skips pydantic validation.
+_QR_TEMPLATES: dict[str, dict] = {
+    key: {
+        "text": value["text"],
+        "intent": value.get("intent", "greeting"),
+        "state": "listening",
+        "intent_source": "cache",
+    }
+    for key, value in QUICK_RESPONSES.items()
+}
+
+
+@functools.lru_cache(maxsize=2048)
 def _check_quick_response(text: str) -> dict | None:
-    """Check if user text matches a cached quick response."""
-    key = text.strip().lower().rstrip(".,!?")
-    return QUICK_RESPONSES.get(key)
+    """Check if user text matches a cached quick response.
+
+    Memoized on the raw utterance so repeats skip the normalization pass
+    entirely; the returned dicts are shared and treated as read-only.
+    """
+    key = text.strip().translate(_PUNCT_TABLE).casefold()
+    return _QR_TEMPLATES.get(key)
 
 
 # ─── Fallback Action Detection ────────────────────────────────────────
@@ -120,7 +191,7 @@ _ACTION_PATTERNS: list[tuple[_re.Pattern, dict]] = [
      {"action": "get_pipeline", "params": {}}),
     (_re.compile(r"(biggest deal|largest deal|biggest opportunity)", _re.I),
      {"action": "get_biggest_deal", "params": {}}),
-    (_re.compile(r"(stale deals?|deals? gone dark|neglected deals?|deals? at risk)", _re.I),
+    (_re.compile(r"(stale deals?|deals? gone dark|neglected deals?|deals? at risk|(?:deals?|opportunities?) (?:gone )?(?:dark|cold|stale|quiet|overdue|stuck)|(?:stale|overdue|stuck) deals?)", _re.I),
      {"action": "get_stale_deals", "params": {}}),
     (_re.compile(r"(closing this week|deals? closing this week|what.?s closing soon)", _re.I),
      {"action": "get_deals_closing", "params": {"period": "this_week"}}),
@@ -138,7 +209,7 @@ _ACTION_PATTERNS: list[tuple[_re.Pattern, dict]] = [
     # ═══════════════════════════════════════════════════════════════════
     (_re.compile(r"(hot leads?|who.?s (?:engaged|hot)|any hot prospects?|buying signals?|warm leads?|engaged leads?)", _re.I),
      {"action": "get_hot_leads", "params": {}}),
-    (_re.compile(r"(who opened|email opens?|who opened my emails?)", _re.I),
+    (_re.compile(r"(who opened|email opens?|who opened my emails?|who(?:'s| has| is)? (?:opened|engaged|active|responding)|email (?:activity|engagement))", _re.I),
      {"action": "get_email_opens", "params": {}}),
     (_re.compile(r"(who clicked|email clicks?|who clicked my emails?|any clicks?|clicks?\b|click (?:activity|stats?))", _re.I),
      {"action": "get_email_clicks", "params": {}}),
@@ -152,19 +223,19 @@ _ACTION_PATTERNS: list[tuple[_re.Pattern, dict]] = [
     # ═══════════════════════════════════════════════════════════════════
     # FELLOW
     # ═══════════════════════════════════════════════════════════════════
-    (_re.compile(r"(my action items?|action items?|what are my action items?|to.?dos? from meetings?)", _re.I),
+    (_re.compile(r"(my action items?|action items?|what are my action items?|to.?dos? from meetings?|to.?dos?|(?:my |are my )?tasks?\b|top \d+ (?:action items?|tasks?))", _re.I),
      {"action": "get_action_items", "params": {}}),
     (_re.compile(r"(overdue items?|overdue tasks?|any overdue)", _re.I),
      {"action": "get_overdue_items", "params": {}}),
-    (_re.compile(r"(last meeting|how did my last call go|last meeting summary|last call)", _re.I),
+    (_re.compile(r"(last meeting|how did my last call go|last meeting summary|last call|last (?:meeting|call)|how (?:did|was) my (?:last )?call)", _re.I),
      {"action": "last_meeting", "params": {}}),
     (_re.compile(r"(today.?s meetings?|meetings? today|what meetings? do i have)", _re.I),
      {"action": "get_today_meetings", "params": {}}),
-    (_re.compile(r"(recent recordings?|recordings? this week|any recordings?)", _re.I),
+    (_re.compile(r"(recent recordings?|recordings? this week|any recordings?|call recordings?|my recordings?)", _re.I),
      {"action": "get_recordings", "params": {}}),
     (_re.compile(r"(transcript|show transcript|last transcript)", _re.I),
      {"action": "get_transcript", "params": {}}),
-    (_re.compile(r"(talk ratio|how much did i talk)", _re.I),
+    (_re.compile(r"(talk(?:ing)?\s*ratio|how much (?:did i|am i) talk)", _re.I),
      {"action": "get_talk_ratio", "params": {}}),
 
     # ═══════════════════════════════════════════════════════════════════
@@ -203,18 +274,6 @@ _ACTION_PATTERNS: list[tuple[_re.Pattern, dict]] = [
     (_re.compile(r"what(?:'s| is) (?:important|urgent)", _re.I),
      {"action": "get_priorities", "params": {}}),
 
-    # ═══════════════════════════════════════════════════════════════════
-    # FELLOW — additional patterns (broader matching)
-    # ═══════════════════════════════════════════════════════════════════
-    (_re.compile(r"talk(?:ing)?\s*ratio|how much (?:did I|am I) talk", _re.I),
-     {"action": "get_talk_ratio", "params": {}}),
-    (_re.compile(r"action items?|to.?dos?|(?:my |are my )?tasks?\b|top \d+ (?:action items?|tasks?)", _re.I),
-     {"action": "get_action_items", "params": {}}),
-    (_re.compile(r"last (?:meeting|call)|how (?:did|was) my (?:last )?call", _re.I),
-     {"action": "last_meeting", "params": {}}),
-    (_re.compile(r"recent recordings?|call recordings?|my recordings?", _re.I),
-     {"action": "get_recordings", "params": {}}),
-
     # ═══════════════════════════════════════════════════════════════════
     # GOOGLE — additional patterns
     # ═══════════════════════════════════════════════════════════════════
@@ -226,50 +285,134 @@ _ACTION_PATTERNS: list[tuple[_re.Pattern, dict]] = [
     # ═══════════════════════════════════════════════════════════════════
     # SALESFORCE — additional patterns
     # ═══════════════════════════════════════════════════════════════════
-    (_re.compile(r"(?:deals?|opportunities?) (?:gone )?(?:dark|cold|stale|quiet|overdue|stuck)|(?:stale|overdue|stuck) deals?", _re.I),
-     {"action": "get_stale_deals", "params": {}}),
     (_re.compile(r"(?:deals?|opportunities?) closing|closing (?:this |next )?(?:week|month)", _re.I),
      {"action": "get_deals_closing", "params": {}}),
 
     # ═══════════════════════════════════════════════════════════════════
     # SALESLOFT — additional patterns (broader matching)
     # ═══════════════════════════════════════════════════════════════════
-    (_re.compile(r"who(?:'s| has| is)? (?:opened|engaged|active|responding)", _re.I),
-     {"action": "get_email_opens", "params": {}}),
     (_re.compile(r"(?:there|are there|any) (?:clicks?|opens?)", _re.I),
      {"action": "get_email_clicks", "params": {}}),
-    (_re.compile(r"email (?:activity|engagement)", _re.I),
-     {"action": "get_email_opens", "params": {}}),
 ]
 
+# All fallback patterns fused into one alternation so a query is scanned
+# once instead of ~40 times. Each alternative is a named group ("a<i>")
+# pointing back into _ACTION_PATTERNS; m.lastgroup names the branch that
+# matched because the outer group closes last.
+_ACTION_TEMPLATES: tuple[dict, ...] = tuple(tpl for _, tpl in _ACTION_PATTERNS)
+_MASTER_ACTION_PATTERN = _re.compile(
+    "|".join(
+        f"(?P<a{i}>{pattern.pattern})"
+        for i, (pattern, _) in enumerate(_ACTION_PATTERNS)
+    ),
+    _re.I,
+)
+
 # Contact lookup — checked last because it's broad (any "look up X" or "find X")
 _CONTACT_PATTERN = _re.compile(
     r"\b(look\s*up|find|search\s*for|who\s*is|tell me about|what.?s\s+\w+.?s\s+(phone|email|number|contact))\b",
     _re.I,
 )
 
+# Name extraction for the contact branch — precompiled so the lookup
+# path doesn't round-trip through the re module's pattern cache per hit.
+_CONTACT_NAME_PATTERN = _re.compile(
+    r"\b(?:look\s*up|find|search\s*for|who\s*is)\s+(?P<name>.+?)(?:\?|$|'s)",
+    _re.I,
+)
+
+# Keyword fast path: most fallback patterns are plain phrase
+# alternatives ("pipeline", "hot leads", "action items"). Those literals
+# are lifted out of the regexes at import time into a set of 1-3 token
+# n-grams, so common queries are gated with hash lookups and the master
+# regex only runs when no literal hits. Both stages only decide WHETHER
+# something matched; the winner is then resolved by pattern-list order
+# (see _scan_query), so priority matches the original per-pattern loop.
+_KW_LITERAL = _re.compile(r"[a-z0-9' ]+")
+
+
+def _build_keyword_table() -> set[str]:
+    table: set[str] = set()
+    for pattern, _ in _ACTION_PATTERNS:
+        raw = pattern.pattern
+        if raw.startswith("(") and raw.endswith(")"):
+            raw = raw[1:-1]
+        for alt in raw.split("|"):
+            alt = alt.strip().lower()
+            if not alt or not _KW_LITERAL.fullmatch(alt):
+                continue  # has regex structure — leave it to the master scan
+            if len(alt.split()) > 3:
+                continue
+            if _MASTER_ACTION_PATTERN.search(alt) is not None:
+                table.add(alt)
+    return table
+
+
+_KW_TABLE = _build_keyword_table()
+
+# Sentinel stages for the memoized scan: >= 0 is a template index.
+_SCAN_CONTACT = -1
+_SCAN_MISS = -2
+
+
+@functools.lru_cache(maxsize=2048)
+def _scan_query(lower: str) -> int:
+    """Memoized pattern stage — maps a lowercased utterance to a template
+    index, _SCAN_CONTACT, or _SCAN_MISS. Only the index is cached; params
+    that depend on the raw text are rebuilt by the caller."""
+    # Literal n-gram lookup first — just a hit gate, priority is
+    # resolved below.
+    tokens = [t.strip(".,!?") for t in lower.split()]
+    count = len(tokens)
+    hit = any(
+        " ".join(tokens[i : i + size]) in _KW_TABLE
+        for i in range(count)
+        for size in (3, 2, 1)
+        if i + size <= count
+    )
+
+    match = None
+    if not hit:
+        match = _MASTER_ACTION_PATTERN.search(lower)
+        if match is None:
+            if _CONTACT_PATTERN.search(lower):
+                return _SCAN_CONTACT
+            return _SCAN_MISS
+
+    # Something matched. The fused alternation (and the n-gram walk)
+    # would pick by leftmost occurrence in the utterance, but the
+    # fallback contract is pattern-LIST priority — "show the pipeline"
+    # must win over an earlier-positioned "last call". One ordered pass
+    # over the individual patterns, paid only on hits and memoized.
+    for i, (pattern, _) in enumerate(_ACTION_PATTERNS):
+        if pattern.search(lower):
+            return i
+    # Defensive: a table literal the individual regexes somehow don't
+    # re-match on the full utterance.
+    return int(match.lastgroup[1:]) if match else _SCAN_MISS
+
+
 def _detect_actions_from_query(text: str) -> list[dict]:
     """Detect actions from user query as fallback when brain doesn't emit them."""
     lower = text.lower()
     logger.debug("[Pattern] Testing %d patterns against: '%s'", len(_ACTION_PATTERNS), lower[:80])
 
-    for pattern, action_template in _ACTION_PATTERNS:
-        if pattern.search(lower):
-            action = dict(action_template)  # shallow copy
-            # Fill in query param for research
-            if action["action"] == "research":
-                action["params"] = {"query": text}
-            logger.info(
-                "[Pattern] MATCH: '%s' → %s (pattern: %s)",
-                lower[:60], action["action"], pattern.pattern[:40],
-            )
-            return [action]
+    index = _scan_query(lower)
+    if index >= 0:
+        action = dict(_ACTION_TEMPLATES[index])  # shallow copy
+        # Fill in query param for research
+        if action["action"] == "research":
+            action["params"] = {"query": text}
+        logger.info(
+            "[Pattern] MATCH: '%s' → %s (pattern: %s)",
+            lower[:60], action["action"], _ACTION_PATTERNS[index][0].pattern[:40],
+        )
+        return [action]
 
     # Contact lookup (broad — check last)
-    if _CONTACT_PATTERN.search(lower):
-        # Extract name: take last 1-3 capitalized words or everything after "look up"/"find"
-        name_match = _re.search(r"(?:look\s*up|find|search\s*for|who\s*is)\s+(.+?)(?:\?|$|'s)", text, _re.I)
-        name = name_match.group(1).strip() if name_match else text
+    if index == _SCAN_CONTACT:
+        name_match = _CONTACT_NAME_PATTERN.search(text)
+        name = name_match.group("name").strip() if name_match else text
         return [{"action": "lookup_contact", "params": {"name": name}}]
 
     return []
@@ -282,7 +425,7 @@ class WebSocketMessage(BaseModel):
     text: str
     metadata: dict[str, Any] = Field(default_factory=dict)
     stream: bool = False
-    request_id: str = Field(default_factory=lambda: f"req_{uuid.uuid4().hex[:12]}")
+    request_id: str = Field(default_factory=lambda: _next_id("req"))
 
 
 class BrainResponse(BaseModel):
@@ -309,6 +452,206 @@ class HealthResponse(BaseModel):
     model: str = MODEL_NAME
 
 
+def _close_truncated_json(s: str) -> str:
+    """
+    Close a truncated JSON document in one pass.
+
+    Tracks string/escape state and the stack of open braces/brackets,
+    then appends the exact closers needed — replaces the old
+    trial-and-error loop that re-parsed the document per candidate
+    suffix.
+    """
+    stack: list[str] = []
+    in_string = False
+    escape = False
+    for ch in s:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            stack.append("}")
+        elif ch == "[":
+            stack.append("]")
+        elif ch in "}]":
+            if stack and stack[-1] == ch:
+                stack.pop()
+    closers = '"' if in_string else ""
+    return s + closers + "".join(reversed(stack))
+
+
+# ─── Streaming Text Extraction ───────────────────────────────────────
+
+class _StreamTextExtractor:
+    """
+    Incrementally pulls the first "text" value out of a streamed JSON
+    response for early TTS hand-off.
+
+    Each feed() call resumes where the previous one stopped, so the
+    accumulated buffer is scanned once overall — the per-chunk regex it
+    replaces rescanned the whole buffer on every token.
+    """
+
+    _SEEK_KEY, _SEEK_COLON, _SEEK_OPEN, _IN_VALUE, _DONE = range(5)
+
+    __slots__ = ("_pos", "_stage", "_buf", "_esc")
+
+    def __init__(self) -> None:
+        self._pos = 0
+        self._stage = self._SEEK_KEY
+        self._buf: list[str] = []
+        self._esc = False
+
+    def feed(self, buffer: str) -> str | None:
+        """Advance through new buffer content; return the completed text
+        value exactly once, None until then (and forever after)."""
+        if self._stage == self._DONE:
+            return None
+
+        if self._stage == self._SEEK_KEY:
+            idx = buffer.find('"text"', self._pos)
+            if idx == -1:
+                # Keep a short overlap in case the key straddles chunks
+                self._pos = max(self._pos, len(buffer) - 5)
+                return None
+            self._pos = idx + 6
+            self._stage = self._SEEK_COLON
+
+        if self._stage == self._SEEK_COLON:
+            while self._pos < len(buffer) and buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos >= len(buffer):
+                return None
+            if buffer[self._pos] != ":":
+                self._stage = self._SEEK_KEY  # false hit inside a string
+                return self.feed(buffer)
+            self._pos += 1
+            self._stage = self._SEEK_OPEN
+
+        if self._stage == self._SEEK_OPEN:
+            while self._pos < len(buffer) and buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos >= len(buffer):
+                return None
+            if buffer[self._pos] != '"':
+                self._stage = self._SEEK_KEY
+                return self.feed(buffer)
+            self._pos += 1
+            self._stage = self._IN_VALUE
+
+        while self._pos < len(buffer):
+            ch = buffer[self._pos]
+            self._pos += 1
+            if self._esc:
+                self._esc = False
+                self._buf.append(ch)
+            elif ch == "\\":
+                self._esc = True
+                self._buf.append(ch)
+            elif ch == '"':
+                self._stage = self._DONE
+                value = "".join(self._buf)
+                self._buf = []
+                return value
+            else:
+                self._buf.append(ch)
+        return None
+
+
+class _StreamBatcher:
+    """
+    Coalesces streaming chunks into batched WebSocket frames.
+
+    The first chunk is sent immediately as a regular ``stream_chunk`` to
+    preserve time-to-first-byte. After that, chunks flow through a bounded
+    queue to a per-request sender task: whatever accumulates while the
+    previous frame is in flight (plus a short coalesce window) goes out
+    together as ``{"type": "stream_batch", "items": [...]}``. The queue
+    bound means a slow client backpressures the Claude reader instead of
+    growing an unbounded buffer.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        request_id: str,
+        coalesce_s: float = 0.005,
+        maxsize: int = 256,
+    ) -> None:
+        self._ws = websocket
+        self._request_id = request_id
+        self._coalesce_s = coalesce_s
+        self._queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=maxsize)
+        self._first_sent = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def add(self, content: str) -> None:
+        """Queue one chunk for delivery."""
+        if not self._first_sent:
+            self._first_sent = True
+            try:
+                await _ws_send(self._ws, {
+                    "type": "stream_chunk",
+                    "request_id": self._request_id,
+                    "content": content,
+                })
+            except Exception:
+                pass
+            self._task = asyncio.create_task(self._drain_loop())
+            return
+        await self._queue.put(content)
+
+    async def _drain_loop(self) -> None:
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is None:  # close sentinel
+                    return
+                await asyncio.sleep(self._coalesce_s)
+                items = [item]
+                closed = False
+                while True:
+                    try:
+                        nxt = self._queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if nxt is None:
+                        closed = True
+                        break
+                    items.append(nxt)
+                try:
+                    await _ws_send(self._ws, {
+                        "type": "stream_batch",
+                        "request_id": self._request_id,
+                        "items": items,
+                    })
+                except Exception:
+                    pass
+                if closed:
+                    return
+        except asyncio.CancelledError:
+            return
+
+    async def close(self) -> None:
+        """Flush any buffered chunks and stop the sender task.
+
+        Idempotent — the stream loop may close early once the TTS text
+        is out, and the end-of-stream path closes unconditionally."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        try:
+            await asyncio.wait_for(self._task, timeout=1.0)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+
 # ─── Brain Engine ─────────────────────────────────────────────────────
 
 class BrainEngine:
@@ -316,7 +659,8 @@ class BrainEngine:
 
     def __init__(self):
         self.client: Optional[AsyncAnthropic] = None
-        self.sessions: dict[str, list[dict[str, str]]] = {}
+        self.sessions: dict[str, deque[dict[str, str]]] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
 
     async def start(self):
         """Initialize Claude API client"""
@@ -324,21 +668,51 @@ class BrainEngine:
             client_kwargs = {"api_key": ANTHROPIC_API_KEY}
             if ANTHROPIC_BASE_URL:
                 client_kwargs["base_url"] = ANTHROPIC_BASE_URL
+            # Generous keepalive so the TLS session from the warmup below
+            # is still open when the first real utterance arrives. HTTP/2
+            # multiplexes concurrent requests when h2 is installed.
+            try:
+                client_kwargs["http_client"] = httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=8, keepalive_expiry=300
+                    ),
+                )
+            except ImportError:
+                pass  # h2 not installed — HTTP/1.1 keepalive still applies
             self.client = AsyncAnthropic(**client_kwargs)
+            self._warmup_task = asyncio.create_task(self._warmup())
             logger.info("Brain engine started with model: %s", MODEL_NAME)
         else:
             logger.error("Cannot start brain engine: ANTHROPIC_API_KEY not set")
 
+    async def _warmup(self):
+        """Pre-open the TLS connection so the first user utterance doesn't
+        pay the TCP + TLS handshake (50-300ms) in the hot voice path."""
+        try:
+            await self.client.messages.create(
+                model=MODEL_NAME,
+                max_tokens=1,
+                messages=[{"role": "user", "content": "."}],
+                system=SALES_COACH_SYSTEM_PROMPT_BLOCKS,
+            )
+            logger.info("Claude connection warmed up")
+        except Exception as exc:
+            logger.debug("Warmup request failed (non-fatal): %s", exc)
+
     async def stop(self):
         """Cleanup"""
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
         if self.client:
             await self.client.close()
         logger.info("Brain engine stopped")
 
     def new_session(self) -> str:
         """Create a new conversation session"""
-        session_id = f"session_{uuid.uuid4().hex[:16]}"
-        self.sessions[session_id] = []
+        session_id = _next_id("session")
+        # maxlen bounds history at 10 exchanges; old turns fall off in O(1)
+        self.sessions[session_id] = deque(maxlen=20)
         logger.info("Created session: %s", session_id)
         return session_id
 
@@ -363,41 +737,47 @@ class BrainEngine:
         Returns:
             Structured BrainResponse with text, intent, entities, actions
         """
-        start_time = time.time()
+        pc = time.perf_counter_ns
+        start_ns = pc()
+        # Stage stamps only matter for the TIMING log line — skip the
+        # clock reads entirely when INFO logging is off.
+        timing = logger.isEnabledFor(logging.INFO)
 
         # ── TIMING: Quick response cache check ──
-        t_cache = time.time()
+        t_cache = pc() if timing else 0
         quick = _check_quick_response(text)
         if quick:
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (pc() - start_ns) / 1e6
             logger.info(
                 "CACHED response: '%s' → '%s' (%.0fms)",
                 text, quick["text"], latency_ms
             )
-            return BrainResponse(
+            return BrainResponse.model_construct(
                 request_id=request_id,
-                text=quick["text"],
-                intent=quick.get("intent", "greeting"),
-                state="listening",
                 latency_ms=latency_ms,
-                intent_source="cache",
+                **quick,
             )
-        t_cache_done = time.time()
+        t_cache_done = pc() if timing else 0
 
         # ── PRE-LLM: Pattern detection (fast path) ──
         # If a high-confidence pattern matches, skip the Claude API call entirely.
         # This is faster (saves 2-4s of LLM latency) and more reliable for
         # known data queries where STT transcripts may confuse the LLM.
-        t_pattern = time.time()
+        t_pattern = pc() if timing else 0
         pre_llm_actions = _detect_actions_from_query(text)
-        t_pattern_done = time.time()
+        t_pattern_done = pc() if timing else 0
         if pre_llm_actions:
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (pc() - start_ns) / 1e6
             matched_action = pre_llm_actions[0]["action"]
             logger.info(
                 "[Pattern] Pre-LLM match: '%s' → %s (skipping Claude API, %.0fms)",
                 text[:60], matched_action, latency_ms,
             )
+            # Keep the session transcript contiguous even though Claude
+            # never saw this turn — later LLM turns still get the context.
+            if session_id and session_id in self.sessions:
+                self.sessions[session_id].append({"role": "user", "content": text})
+                self.sessions[session_id].append({"role": "assistant", "content": "."})
             return BrainResponse(
                 request_id=request_id,
                 text=".",
@@ -417,104 +797,127 @@ class BrainEngine:
             )
 
         # ── TIMING: Build messages ──
-        t_build = time.time()
-        history = []
+        t_build = pc() if timing else 0
+        # Session entries are already stored in Claude's message shape,
+        # so history splices straight in — no per-turn dict rebuilding.
+        history = ()
         if session_id and session_id in self.sessions:
-            history = self.sessions[session_id][-10:]  # Last 10 turns
+            session = self.sessions[session_id]
+            # Last 10 turns without materializing an intermediate slice
+            history = itertools.islice(session, max(0, len(session) - 10), None)
 
-        messages = []
-        for h in history:
-            messages.append({"role": h["role"], "content": h["content"]})
-        messages.append({"role": "user", "content": text})
-        t_build_done = time.time()
+        messages = [*history, {"role": "user", "content": text}]
+        t_build_done = pc() if timing else 0
 
         try:
             # ── TIMING: Claude API call (streaming) ──
-            t_api = time.time()
+            t_api = pc()
             response_text = ""
             t_first_token = None
 
             tts_chunk_sent = False
-
-            async with self.client.messages.stream(
-                model=MODEL_NAME,
-                max_tokens=MAX_TOKENS,
-                temperature=TEMPERATURE,
-                system=SALES_COACH_SYSTEM_PROMPT,
-                messages=messages
-            ) as stream:
-                async for chunk in stream.text_stream:
-                    if t_first_token is None:
-                        t_first_token = time.time()
-                    response_text += chunk
-
-                    if websocket:
-                        # Send raw streaming chunk
-                        try:
-                            await websocket.send_json({
-                                "type": "stream_chunk",
-                                "request_id": request_id,
-                                "content": chunk,
-                            })
-                        except Exception:
-                            pass
-
-                        # Extract "text" field for early TTS pre-synthesis
-                        if not tts_chunk_sent:
-                            text_match = _re.search(
-                                r'"text"\s*:\s*"((?:[^"\\]|\\.)*)"',
-                                response_text,
-                            )
-                            if text_match:
-                                tts_text = text_match.group(1).strip()
-                                if tts_text and tts_text != ".":
-                                    tts_chunk_sent = True
-                                    try:
-                                        await websocket.send_json({
-                                            "type": "tts_chunk",
-                                            "request_id": request_id,
-                                            "text": tts_text,
-                                        })
-                                        logger.info(
-                                            "TTS chunk sent: '%s' (%.0fms after first token)",
-                                            tts_text[:60],
-                                            (time.time() - (t_first_token or t_api)) * 1000,
-                                        )
-                                    except Exception:
-                                        pass
-
-            t_api_done = time.time()
+            tts_extractor = _StreamTextExtractor() if websocket else None
+            batcher = _StreamBatcher(websocket, request_id) if websocket else None
+            # Raw chunks only matter until the TTS text is extracted —
+            # after that the client consumes nothing else until the final
+            # response, so stop forwarding tokens entirely.
+            forward_raw = True
+
+            # The batcher's drain task must be closed even when the
+            # stream dies mid-flight (API error, disconnect) — otherwise
+            # it blocks on queue.get() forever, one leaked task per
+            # failed request. close() is idempotent.
+            try:
+                async with self.client.messages.stream(
+                    model=MODEL_NAME,
+                    max_tokens=MAX_TOKENS,
+                    temperature=TEMPERATURE,
+                    system=SALES_COACH_SYSTEM_PROMPT_BLOCKS,
+                    messages=messages
+                ) as stream:
+                    async for chunk in stream.text_stream:
+                        if t_first_token is None:
+                            t_first_token = pc()
+                        response_text += chunk
+
+                        if websocket:
+                            # Send raw streaming chunk (batched after the first)
+                            if forward_raw:
+                                await batcher.add(chunk)
+
+                            # Extract "text" field for early TTS pre-synthesis
+                            if not tts_chunk_sent:
+                                tts_value = tts_extractor.feed(response_text)
+                                if tts_value is not None:
+                                    tts_text = tts_value.strip()
+                                    if tts_text and tts_text != ".":
+                                        tts_chunk_sent = True
+                                        # The client consumes nothing after
+                                        # the TTS text until the final
+                                        # response — stop forwarding tokens
+                                        # and flush what's already queued.
+                                        forward_raw = False
+                                        await batcher.close()
+                                        try:
+                                            await _ws_send(websocket, {
+                                                "type": "tts_chunk",
+                                                "request_id": request_id,
+                                                "text": tts_text,
+                                            })
+                                            logger.info(
+                                                "TTS chunk sent: '%s' (%.0fms after first token)",
+                                                tts_text[:60],
+                                                (pc() - (t_first_token or t_api)) / 1e6,
+                                            )
+                                        except Exception:
+                                            pass
+
+            finally:
+                if batcher is not None:
+                    await batcher.close()
+
+            if websocket:
+                try:
+                    await _ws_send(websocket, {
+                        "type": "stream_end",
+                        "request_id": request_id,
+                    })
+                except Exception:
+                    pass
+
+            t_api_done = pc() if timing else 0
 
             # ── TIMING: Parse response ──
-            t_parse = time.time()
+            t_parse = pc() if timing else 0
 
-            # Strip markdown code blocks that Claude sometimes wraps around JSON
+            # Strip markdown code blocks that Claude sometimes wraps around
+            # JSON — slice between the fence lines instead of splitting and
+            # re-joining every line.
             cleaned = response_text.strip()
             if cleaned.startswith("```"):
-                lines = cleaned.split("\n")
-                lines = lines[1:]
-                if lines and lines[-1].strip() == "```":
-                    lines = lines[:-1]
-                cleaned = "\n".join(lines).strip()
-
-            # Parse JSON response — try multiple strategies
+                nl = cleaned.find("\n")
+                end = cleaned.rfind("```")
+                if nl != -1 and end > nl:
+                    cleaned = cleaned[nl + 1 : end].strip()
+                elif nl != -1:
+                    cleaned = cleaned[nl + 1 :].strip()
+
+            # Parse JSON response — direct parse, then one-shot repair
             parsed = None
 
             # Strategy 1: direct JSON parse
             try:
-                parsed = json.loads(cleaned)
-            except json.JSONDecodeError:
+                parsed = _json_loads(cleaned)
+            except ValueError:
                 pass
 
-            # Strategy 2: truncated JSON — find last complete JSON object
+            # Strategy 2: truncated JSON — close open scopes in one pass
             if parsed is None and cleaned.startswith("{"):
-                for suffix in ['}', ']}', '"]}', '"}]}', '""]}']:
-                    try:
-                        parsed = json.loads(cleaned + suffix)
-                        logger.info("Repaired truncated JSON with suffix: %s", suffix)
-                        break
-                    except json.JSONDecodeError:
-                        continue
+                try:
+                    parsed = _json_loads(_close_truncated_json(cleaned))
+                    logger.info("Repaired truncated JSON")
+                except ValueError:
+                    pass
 
             if parsed and isinstance(parsed, dict):
                 brain_text = parsed.get("text", ".")
@@ -535,10 +938,10 @@ class BrainEngine:
                 actions = []
                 state = "listening"
 
-            t_parse_done = time.time()
+            t_parse_done = pc() if timing else 0
 
             # ── TIMING: Fallback action detection ──
-            t_fallback = time.time()
+            t_fallback = pc() if timing else 0
             _intent_source = "llm"
             if not actions:
                 actions = _detect_actions_from_query(text)
@@ -549,7 +952,7 @@ class BrainEngine:
                         "[Fallback] Pattern match: '%s' → %s (LLM missed)",
                         text[:60], actions[0]["action"],
                     )
-            t_fallback_done = time.time()
+            t_fallback_done = pc() if timing else 0
 
             # Guard: Claude API requires non-empty content in all messages
             if not brain_text or not brain_text.strip():
@@ -559,27 +962,26 @@ class BrainEngine:
             if session_id and session_id in self.sessions:
                 self.sessions[session_id].append({"role": "user", "content": text})
                 self.sessions[session_id].append({"role": "assistant", "content": brain_text})
-                if len(self.sessions[session_id]) > 20:
-                    self.sessions[session_id] = self.sessions[session_id][-20:]
 
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (pc() - start_ns) / 1e6
 
             # ── TIMING BREAKDOWN ──
-            logger.info(
-                "TIMING: total=%.0fms | cache=%.0fms | pattern=%.0fms | build=%.0fms | "
-                "api=%.0fms (first_token=%.0fms) | parse=%.0fms | fallback=%.0fms | "
-                "intent=%s actions=%d",
-                latency_ms,
-                (t_cache_done - t_cache) * 1000,
-                (t_pattern_done - t_pattern) * 1000,
-                (t_build_done - t_build) * 1000,
-                (t_api_done - t_api) * 1000,
-                ((t_first_token - t_api) * 1000) if t_first_token else 0,
-                (t_parse_done - t_parse) * 1000,
-                (t_fallback_done - t_fallback) * 1000,
-                intent,
-                len(actions),
-            )
+            if timing:
+                logger.info(
+                    "TIMING: total=%.0fms | cache=%.0fms | pattern=%.0fms | build=%.0fms | "
+                    "api=%.0fms (first_token=%.0fms) | parse=%.0fms | fallback=%.0fms | "
+                    "intent=%s actions=%d",
+                    latency_ms,
+                    (t_cache_done - t_cache) / 1e6,
+                    (t_pattern_done - t_pattern) / 1e6,
+                    (t_build_done - t_build) / 1e6,
+                    (t_api_done - t_api) / 1e6,
+                    ((t_first_token - t_api) / 1e6) if t_first_token else 0,
+                    (t_parse_done - t_parse) / 1e6,
+                    (t_fallback_done - t_fallback) / 1e6,
+                    intent,
+                    len(actions),
+                )
 
             return BrainResponse(
                 request_id=request_id,
@@ -594,7 +996,7 @@ class BrainEngine:
 
         except Exception as exc:
             logger.error("Brain processing error: %s", exc)
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (pc() - start_ns) / 1e6
             return BrainResponse(
                 request_id=request_id,
                 text="I'm having trouble processing that right now. Could you try again?",
@@ -612,9 +1014,24 @@ brain = BrainEngine()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
+    # Route log records through a queue to a background thread so hot-path
+    # logger calls never block the event loop on stderr I/O.
+    root = logging.getLogger()
+    direct_handlers = root.handlers[:]
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(
+        log_queue, *direct_handlers, respect_handler_level=True
+    )
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+
     await brain.start()
-    yield
-    await brain.stop()
+    try:
+        yield
+    finally:
+        await brain.stop()
+        listener.stop()
+        root.handlers = direct_handlers
 
 
 app = FastAPI(
@@ -639,20 +1056,24 @@ async def websocket_endpoint(websocket: WebSocket):
         {"type": "response", "request_id": "req_123", "text": "...", "intent": "...", ...}
     """
     await websocket.accept()
-    client_id = f"ws_{uuid.uuid4().hex[:8]}"
+    client_id = _next_id("ws")
     session_id = brain.new_session()
     logger.info("WebSocket connected: %s (session=%s)", client_id, session_id)
 
     try:
         while True:
-            # Receive message
-            data = await websocket.receive_text()
+            # Receive message — take the raw frame so binary senders skip
+            # the bytes→str decode; pydantic v2 validates bytes directly.
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code") or 1000)
+            data = raw["bytes"] if raw.get("bytes") is not None else raw.get("text", "")
 
             try:
                 message = WebSocketMessage.model_validate_json(data)
             except Exception as e:
                 logger.warning("Invalid message format: %s", e)
-                await websocket.send_json({
+                await _ws_send(websocket, {
                     "type": "error",
                     "error": "Invalid message format",
                     "details": str(e)
@@ -660,7 +1081,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 continue
 
             if not message.text.strip():
-                await websocket.send_json({
+                await _ws_send(websocket, {
                     "type": "error",
                     "request_id": message.request_id,
                     "error": "Empty text"
@@ -677,7 +1098,7 @@ async def websocket_endpoint(websocket: WebSocket):
             )
 
             # Send response
-            await websocket.send_json(response.model_dump())
+            await _ws_send(websocket, response.model_dump())
 
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected: %s", client_id)
@@ -730,13 +1151,23 @@ def main():
     logger.info("WebSocket: ws://127.0.0.1:8780/ws")
     logger.info("Health: http://127.0.0.1:8780/health")
 
-    uvicorn.run(
-        app,
-        host="127.0.0.1",
-        port=8780,
-        log_level="info",
-        access_log=True
-    )
+    run_kwargs: dict[str, Any] = {
+        "host": "127.0.0.1",
+        "port": 8780,
+        "log_level": "info",
+        "access_log": False,  # per-request log I/O on the hot path
+    }
+    try:
+        # uvloop + httptools ship with uvicorn[standard]; fall back to the
+        # pure-Python loop/parser if this install doesn't have them.
+        import httptools  # noqa: F401
+        import uvloop  # noqa: F401
+
+        run_kwargs.update(loop="uvloop", http="httptools", ws="websockets")
+    except ImportError:
+        logger.warning("uvloop/httptools not installed — using default loop")
+
+    uvicorn.run(app, **run_kwargs)
 
 
 if __name__ == "__main__":
@@ -7,10 +7,31 @@ No keyword matching. No regex. The brain tells us what state we're in.
 
 from __future__ import annotations
 
+import asyncio
+import itertools
+import threading
 import time
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
+
+try:  # C serializer when available — telemetry polls are hot
+    import orjson
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:  # pragma: no cover
+    import json
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+
+# Hot-path alias: duration math uses the monotonic clock (no wall-clock
+# syscall, immune to clock steps); wall time is kept only for export.
+_now = time.monotonic
 
 
 class ConversationState(str, Enum):
@@ -32,21 +53,59 @@ class ConversationState(str, Enum):
     FAREWELL = "farewell"
 
 
-@dataclass
+# Internal integer IDs: snapshots store an int and translate back to the
+# enum (or its serialized value) only at the API boundary, so history
+# comparisons and analytics filters hash/compare machine ints instead of
+# str-Enum members.
+_STATE_TO_ID: dict[ConversationState, int] = {
+    s: i for i, s in enumerate(ConversationState)
+}
+_ID_TO_STATE: tuple[ConversationState, ...] = tuple(ConversationState)
+_ID_TO_VALUE: tuple[str, ...] = tuple(s.value for s in ConversationState)
+
+# Public deserialization map: one dict hit instead of the Enum call's
+# value-lookup/_missing_ machinery when parsing brain responses.
+STATE_BY_VALUE: dict[str, ConversationState] = {
+    s.value: s for s in ConversationState
+}
+
+
+@dataclass(slots=True)
 class StateSnapshot:
-    """A point-in-time record of a state transition."""
+    """A point-in-time record of a state transition.
+
+    ``entered_at``/``exited_at`` are wall-clock for export; durations are
+    computed from the monotonic pair so polling never hits the system
+    clock and clock steps can't produce negative durations.
+
+    ``state_id`` is the internal integer form; the public ``state``
+    property translates back to :class:`ConversationState`.
+    """
 
-    state: ConversationState
+    state_id: int
     entered_at: float
     exited_at: Optional[float] = None
     trigger_turn_id: Optional[str] = None
-    metadata: dict[str, Any] = field(default_factory=dict)
+    # Lazy — most transitions carry none; meta() creates it on first write
+    metadata: Optional[dict[str, Any]] = None
+    entered_mono: float = field(default_factory=_now)
+    exited_mono: Optional[float] = None
+
+    @property
+    def state(self) -> ConversationState:
+        return _ID_TO_STATE[self.state_id]
+
+    def meta(self, key: str, value: Any) -> None:
+        """Set a metadata entry, creating the dict on first write."""
+        if self.metadata is None:
+            self.metadata = {}
+        self.metadata[key] = value
 
     @property
     def duration(self) -> Optional[float]:
-        if self.exited_at:
-            return self.exited_at - self.entered_at
-        return time.time() - self.entered_at
+        if self.exited_mono:
+            return self.exited_mono - self.entered_mono
+        return _now() - self.entered_mono
 
 
 class StateTracker:
@@ -59,13 +118,40 @@ class StateTracker:
     - Validates transitions (soft — logs anomalies, never blocks)
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        async_listeners: bool = False,
+        queue_size: int = 256,
+    ) -> None:
+        """
+        Args:
+            async_listeners: Dispatch listener callbacks from a background
+                task instead of inline in transition(), so a slow webhook
+                or UI listener can't stall state bookkeeping. Requires a
+                running event loop; falls back to inline dispatch without
+                one. Default off for back-compat.
+            queue_size: Bound of the dispatch queue; on overflow the
+                oldest undelivered transition is dropped.
+        """
         self._current: StateSnapshot = StateSnapshot(
-            state=ConversationState.IDLE,
+            state_id=_STATE_TO_ID[ConversationState.IDLE],
             entered_at=time.time(),
         )
-        self._history: list[StateSnapshot] = [self._current]
-        self._listeners: list[Any] = []
+        # Ring buffer — old transitions fall off in O(1), no slice copies
+        self._history: deque[StateSnapshot] = deque([self._current], maxlen=500)
+        # Tracked explicitly rather than via history[-2]: immune to ring
+        # trimming and coalescing reshaping the deque tail.
+        self._previous: Optional[StateSnapshot] = None
+        # Guards the transition commit section; uncontended acquire is
+        # nanoseconds, and listeners run outside it.
+        self._lock = threading.Lock()
+        # Copy-on-write: registration swaps in a new tuple (atomic under
+        # the GIL), so the hot path iterates without defensive copies.
+        self._listeners: tuple[Any, ...] = ()
+        self._async_listeners = async_listeners
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
 
     @property
     def current_state(self) -> ConversationState:
@@ -76,62 +162,191 @@ class StateTracker:
         return self._current
 
     @property
-    def history(self) -> list[StateSnapshot]:
-        return list(self._history)
+    def history(self) -> tuple[StateSnapshot, ...]:
+        """Immutable snapshot of the transition history."""
+        return tuple(self._history)
+
+    def history_view(self) -> Sequence[StateSnapshot]:
+        """Zero-copy view for iteration-only callers (analytics); do not
+        mutate, and don't hold across transitions."""
+        return self._history
 
     def transition(
         self,
         new_state: ConversationState,
         trigger_turn_id: Optional[str] = None,
         metadata: Optional[dict[str, Any]] = None,
+        coalesce: bool = True,
     ) -> StateSnapshot:
         """
         Record a state transition as reported by the brain.
         Returns the new state snapshot.
+
+        When ``coalesce`` is True (default), re-reporting the current
+        state (common during a sustained debrief) bumps a
+        ``repeat_count`` on the live snapshot instead of allocating a
+        new one and firing listeners — history records state *changes*,
+        not every brain turn.
         """
-        now = time.time()
+        state_id = _STATE_TO_ID[new_state]
+        # The commit section is a critical section: two tasks (or a
+        # thread feeding the engine) interleaving here could pair the
+        # wrong old/new snapshots or corrupt the ring. Listeners fire
+        # OUTSIDE the lock so a slow callback can't stall other
+        # transitioners — which means a callback may observe a
+        # current_state newer than the transition it was called for.
+        with self._lock:
+            if coalesce and state_id == self._current.state_id:
+                meta = self._current.metadata
+                if meta is None:
+                    meta = self._current.metadata = {}
+                meta["repeat_count"] = meta.get("repeat_count", 1) + 1
+                if metadata:
+                    meta.update(metadata)
+                return self._current
 
-        # Close the current state
-        self._current.exited_at = now
+            now_mono = _now()
 
-        # Open the new state
-        snapshot = StateSnapshot(
-            state=new_state,
-            entered_at=now,
-            trigger_turn_id=trigger_turn_id,
-            metadata=metadata or {},
-        )
-        self._current = snapshot
-        self._history.append(snapshot)
+            # Close the current state
+            self._current.exited_at = time.time()
+            self._current.exited_mono = now_mono
 
-        # Trim history to prevent unbounded growth (keep last 500)
-        if len(self._history) > 500:
-            self._history = self._history[-500:]
+            # Open the new state. Once the ring is full, recycle the snapshot
+            # being evicted instead of allocating a fresh one — steady-state
+            # transitions are allocation-free. Consequence: a snapshot
+            # reference held across 500+ transitions will be overwritten;
+            # callers wanting durable records should copy what they need.
+            history = self._history
+            if len(history) == history.maxlen:
+                snapshot = history.popleft()
+                snapshot.state_id = state_id
+                snapshot.entered_at = self._current.exited_at
+                snapshot.exited_at = None
+                snapshot.trigger_turn_id = trigger_turn_id
+                snapshot.metadata = metadata
+                snapshot.entered_mono = now_mono
+                snapshot.exited_mono = None
+            else:
+                snapshot = StateSnapshot(
+                    state_id=state_id,
+                    entered_at=self._current.exited_at,
+                    trigger_turn_id=trigger_turn_id,
+                    metadata=metadata,
+                    entered_mono=now_mono,
+                )
+            # Ordering contract: _current and history are fully updated
+            # BEFORE listeners fire, so a callback reading the tracker always
+            # sees the post-transition state (and re-entrant transitions
+            # chain instead of corrupting bookkeeping).
+            old = self._current
+            self._previous = old
+            self._current = snapshot
+            self._history.append(snapshot)
 
-        # Notify listeners
-        for listener in self._listeners:
+        # Notify listeners — the tuple is immutable, so a callback
+        # registering mid-dispatch swaps in a new one without touching
+        # this iteration.
+        listeners = self._listeners
+        if self._async_listeners and listeners and self._enqueue(old, snapshot):
+            return snapshot
+        for listener in listeners:
             try:
-                listener(self._history[-2], snapshot)
+                listener(old, snapshot)
             except Exception:
                 pass  # listeners must not crash the engine
 
         return snapshot
 
+    def _enqueue(self, old: StateSnapshot, new: StateSnapshot) -> bool:
+        """Queue a transition for background dispatch.
+
+        Returns False when no event loop is running, in which case the
+        caller falls back to inline dispatch. On a full queue the oldest
+        undelivered transition is dropped — listeners are observers, and
+        a stale backlog is worse than a gap.
+        """
+        if self._queue is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return False
+            self._queue = asyncio.Queue(maxsize=self._queue_size)
+            self._dispatch_task = loop.create_task(self._dispatch_loop())
+        try:
+            self._queue.put_nowait((old, new))
+        except asyncio.QueueFull:
+            try:
+                self._queue.get_nowait()  # drop oldest
+                self._queue.put_nowait((old, new))
+            except (asyncio.QueueEmpty, asyncio.QueueFull):
+                pass
+        return True
+
+    async def _dispatch_loop(self) -> None:
+        try:
+            while True:
+                old, new = await self._queue.get()
+                for listener in self._listeners:
+                    try:
+                        listener(old, new)
+                    except Exception:
+                        pass  # listeners must not crash the engine
+        except asyncio.CancelledError:
+            return
+
     def on_transition(self, callback: Any) -> None:
         """Register a callback for state transitions: fn(old_snapshot, new_snapshot)."""
-        self._listeners.append(callback)
+        self._listeners = self._listeners + (callback,)
 
     def time_in_current_state(self) -> float:
-        return time.time() - self._current.entered_at
+        return _now() - self._current.entered_mono
 
     def last_n_states(self, n: int = 5) -> list[ConversationState]:
-        return [s.state for s in self._history[-n:]]
+        count = len(self._history)
+        tail = itertools.islice(self._history, max(0, count - n), None)
+        return [_ID_TO_STATE[s.state_id] for s in tail]
 
     def to_dict(self) -> dict[str, Any]:
         return {
-            "current_state": self._current.state.value,
+            "current_state": _ID_TO_VALUE[self._current.state_id],
             "entered_at": self._current.entered_at,
             "duration": self._current.duration,
             "total_transitions": len(self._history),
-            "recent_states": [s.state.value for s in self._history[-10:]],
+            "recent_states": [
+                _ID_TO_VALUE[s.state_id]
+                for s in itertools.islice(
+                    self._history, max(0, len(self._history) - 10), None
+                )
+            ],
         }
+
+    def dwell_histogram(self) -> list[int]:
+        """Occurrence counts per :class:`ConversationState` (enum order)
+        over the retained history — a single pass over the integer state
+        IDs, so analytics never touch the snapshot objects."""
+        counts = [0] * len(_ID_TO_STATE)
+        for s in self._history:
+            counts[s.state_id] += 1
+        return counts
+
+    def to_json_bytes(self) -> bytes:
+        """``to_dict`` serialized in one shot, for high-frequency
+        telemetry polls — skips Python-level json dispatch when orjson
+        is installed and reads the monotonic clock exactly once."""
+        cur = self._current
+        history = self._history
+        now_mono = _now()
+        return _json_dumps(
+            {
+                "current_state": _ID_TO_VALUE[cur.state_id],
+                "entered_at": cur.entered_at,
+                "duration": (cur.exited_mono or now_mono) - cur.entered_mono,
+                "total_transitions": len(history),
+                "recent_states": [
+                    _ID_TO_VALUE[s.state_id]
+                    for s in itertools.islice(
+                        history, max(0, len(history) - 10), None
+                    )
+                ],
+            }
+        )
@@ -0,0 +1,20 @@
+"""
+Shared pytest configuration for the brain test suite.
+
+The package import path comes from ``pythonpath`` in pyproject.toml, so
+test modules no longer mutate ``sys.path`` at import time.
+"""
+
+import os
+
+# Don't even collect the live-server file on default runs — skipping at
+# collection avoids importing websockets and parsing the module at all.
+collect_ignore = (
+    [] if os.getenv("RUN_INTEGRATION") else ["test_websocket_integration.py"]
+)
+
+
+def pytest_configure(config):
+    # A key must be present before razor_brain.server is imported — the
+    # tests mock the actual Anthropic client.
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test_key_12345")
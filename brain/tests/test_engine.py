@@ -5,6 +5,7 @@ Run: pytest tests/ -v
 """
 
 import asyncio
+import itertools
 import json
 import time
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -87,10 +88,14 @@ class TestConversationContext:
         # Gamma should survive (most referenced)
         assert ctx.find_entity("Gamma") is not None
 
-    def test_recent_entities(self):
+    def test_recent_entities(self, monkeypatch):
+        # Patch the module clock instead of sleeping — recency ordering
+        # only needs increasing ticks, and the sleep made this test flaky
+        # under coarse timers.
+        tick = itertools.count(1)
+        monkeypatch.setattr("razor_brain.context._clock_ns", lambda: next(tick))
         ctx = ConversationContext()
         ctx.track_entity("Old Person", "person")
-        time.sleep(0.01)
         ctx.track_entity("New Person", "person")
 
         recent = ctx.get_recent_entities(1)
@@ -158,6 +163,20 @@ class TestStateTracker:
         assert len(calls) == 1
         assert calls[0] == (ConversationState.IDLE, ConversationState.DEBRIEFING)
 
+    def test_coalesce_repeated_transition(self):
+        st = StateTracker()
+        first = st.transition(ConversationState.DEBRIEFING)
+        again = st.transition(ConversationState.DEBRIEFING, metadata={"turn": 2})
+
+        assert again is first
+        assert len(st.history) == 2  # IDLE + DEBRIEFING, no duplicate
+        assert first.metadata["repeat_count"] == 2
+        assert first.metadata["turn"] == 2
+
+        # Opting out records the duplicate as a real transition
+        st.transition(ConversationState.DEBRIEFING, coalesce=False)
+        assert len(st.history) == 3
+
     def test_last_n_states(self):
         st = StateTracker()
         st.transition(ConversationState.GREETING)
@@ -234,43 +253,54 @@ class TestBrainResponse:
 # Engine Integration Tests (with mocked gateway)
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-class TestConversationEngine:
-    @pytest.fixture
-    def mock_gateway_response(self):
-        """Standard mock brain response."""
-        return {
-            "request_id": "test-123",
-            "content": {
-                "response_text": "Got it, I'll note that Marcus wants to push to Q3.",
-                "inferred_intent": "call_debrief",
-                "inferred_state": "debriefing",
-                "entities_detected": [
-                    {"name": "Marcus", "type": "person", "aliases": ["Marc"]},
-                    {"name": "Clearwater Capital", "type": "company", "aliases": ["CWC"]},
-                ],
-                "suggested_actions": [
-                    {
-                        "action": "log_call",
-                        "params": {"contact": "Marcus", "company": "Clearwater Capital"},
-                        "label": "Log this call",
-                    }
-                ],
-                "follow_up_prompt": "Want me to draft a follow-up email to Marcus?",
-                "confidence": 0.92,
-                "needs_clarification": False,
-                "context_summary_update": None,
-            },
-        }
-
-    @pytest.mark.asyncio
-    async def test_full_pipeline(self, mock_gateway_response):
-        engine = ConversationEngine()
+@pytest.fixture(scope="session")
+def engine_factory():
+    """Prewired engine builder — gateway mocked out, started flag set.
 
-        # Mock the gateway
+    Session-scoped: the closure carries no state, every call returns a
+    fresh engine, so tests skip re-declaring the same three mock lines.
+    """
+    def make(response=None, config=None):
+        engine = ConversationEngine(config=config)
         engine.gateway.connect = AsyncMock()
-        engine.gateway.send = AsyncMock(return_value=mock_gateway_response)
-        engine.gateway.is_connected = True
+        engine.gateway.send = AsyncMock(return_value=response)
         engine._started = True
+        return engine
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def mock_gateway_response():
+    """Standard mock brain response (pure data — shared across the session)."""
+    return {
+        "request_id": "test-123",
+        "content": {
+            "response_text": "Got it, I'll note that Marcus wants to push to Q3.",
+            "inferred_intent": "call_debrief",
+            "inferred_state": "debriefing",
+            "entities_detected": [
+                {"name": "Marcus", "type": "person", "aliases": ["Marc"]},
+                {"name": "Clearwater Capital", "type": "company", "aliases": ["CWC"]},
+            ],
+            "suggested_actions": [
+                {
+                    "action": "log_call",
+                    "params": {"contact": "Marcus", "company": "Clearwater Capital"},
+                    "label": "Log this call",
+                }
+            ],
+            "follow_up_prompt": "Want me to draft a follow-up email to Marcus?",
+            "confidence": 0.92,
+            "needs_clarification": False,
+            "context_summary_update": None,
+        },
+    }
+
+
+class TestConversationEngine:
+    async def test_full_pipeline(self, engine_factory, mock_gateway_response):
+        engine = engine_factory(mock_gateway_response)
 
         response = await engine.process(
             "Just talked to Marcus at Clearwater, he wants to push the deal to Q3"
@@ -297,12 +327,8 @@ class TestConversationEngine:
         # Verify turns recorded
         assert engine.context.turn_count == 2  # user + brain
 
-    @pytest.mark.asyncio
-    async def test_multi_turn_context_accumulation(self, mock_gateway_response):
-        engine = ConversationEngine()
-        engine.gateway.connect = AsyncMock()
-        engine.gateway.send = AsyncMock(return_value=mock_gateway_response)
-        engine._started = True
+    async def test_multi_turn_context_accumulation(self, engine_factory, mock_gateway_response):
+        engine = engine_factory(mock_gateway_response)
 
         await engine.process("First message")
         await engine.process("Second message")
@@ -311,40 +337,34 @@ class TestConversationEngine:
         # Each process call adds 2 turns (user + brain)
         assert engine.context.turn_count == 6
 
-        # The payload sent to gateway should contain all turns in the window
+        # The payload sent to the gateway carries the history plus the
+        # current user turn — the brain's reply to that turn doesn't
+        # exist yet when the context is serialized, so the third send
+        # sees 5 turns, not 6.
         last_call = engine.gateway.send.call_args
         payload = last_call[1]["payload"] if "payload" in (last_call[1] or {}) else last_call[0][0]
         context = payload.get("context", {})
-        assert len(context.get("turns", [])) == 6
+        assert len(context.get("turns", [])) == 5
 
-    @pytest.mark.asyncio
-    async def test_timeout_recovery(self):
-        engine = ConversationEngine(
-            config=EngineConfig(response_timeout=0.1)
-        )
-        engine.gateway.connect = AsyncMock()
+    async def test_timeout_recovery(self, engine_factory):
+        engine = engine_factory(config=EngineConfig(response_timeout=0.1))
         engine.gateway.send = AsyncMock(side_effect=TimeoutError("Timed out"))
-        engine._started = True
 
         response = await engine.process("Hello?")
 
         assert "trouble connecting" in response.text.lower() or "having trouble" in response.text.lower()
         assert engine.state.current_state == ConversationState.ERROR_RECOVERY
 
-    @pytest.mark.asyncio
-    async def test_connection_error_recovery(self):
-        engine = ConversationEngine()
-        engine.gateway.connect = AsyncMock()
+    async def test_connection_error_recovery(self, engine_factory):
+        engine = engine_factory()
         engine.gateway.send = AsyncMock(side_effect=ConnectionError("Lost"))
-        engine._started = True
 
         response = await engine.process("Anyone there?")
 
         assert "connection" in response.text.lower() or "reconnect" in response.text.lower()
         assert engine.state.current_state == ConversationState.ERROR_RECOVERY
 
-    @pytest.mark.asyncio
-    async def test_callbacks_fired(self, mock_gateway_response):
+    async def test_callbacks_fired(self, engine_factory, mock_gateway_response):
         response_log = []
         action_log = []
 
@@ -352,10 +372,7 @@ class TestConversationEngine:
             on_response=lambda r: response_log.append(r),
             on_action=lambda a: action_log.append(a),
         )
-        engine = ConversationEngine(config)
-        engine.gateway.connect = AsyncMock()
-        engine.gateway.send = AsyncMock(return_value=mock_gateway_response)
-        engine._started = True
+        engine = engine_factory(mock_gateway_response, config=config)
 
         await engine.process("Log this call")
 
@@ -364,12 +381,8 @@ class TestConversationEngine:
         assert len(action_log) == 1
         assert action_log[0]["action"] == "log_call"
 
-    @pytest.mark.asyncio
-    async def test_new_session_resets(self, mock_gateway_response):
-        engine = ConversationEngine()
-        engine.gateway.connect = AsyncMock()
-        engine.gateway.send = AsyncMock(return_value=mock_gateway_response)
-        engine._started = True
+    async def test_new_session_resets(self, engine_factory, mock_gateway_response):
+        engine = engine_factory(mock_gateway_response)
 
         await engine.process("Build up some context")
         old_session = engine.session_id
@@ -391,12 +404,9 @@ class TestNoHardcodedCommands:
     Every utterance must go to the brain untouched.
     """
 
-    @pytest.mark.asyncio
-    async def test_all_input_reaches_brain(self):
+    async def test_all_input_reaches_brain(self, engine_factory):
         """Every user message must be sent to the gateway exactly as-is."""
-        engine = ConversationEngine()
-        engine.gateway.connect = AsyncMock()
-        engine.gateway.send = AsyncMock(return_value={
+        ok_response = {
             "content": {
                 "response_text": "OK",
                 "inferred_intent": "unknown",
@@ -408,8 +418,18 @@ class TestNoHardcodedCommands:
                 "needs_clarification": False,
                 "context_summary_update": None,
             }
-        })
-        engine._started = True
+        }
+
+        # Capture what actually crosses the wire, then assert the whole
+        # sequence at once — also catches reordering or dropped inputs.
+        captured = []
+
+        async def _capture(payload, **kwargs):
+            captured.append(payload["user_message"])
+            return ok_response
+
+        engine = engine_factory()
+        engine.gateway.send = AsyncMock(side_effect=_capture)
 
         test_inputs = [
             "call John",
@@ -428,8 +448,6 @@ class TestNoHardcodedCommands:
                 continue
             await engine.process(user_input)
 
-            # Verify the last gateway call contains the raw user input
-            call_args = engine.gateway.send.call_args[0][0]
-            assert call_args["user_message"] == user_input, (
-                f"Input '{user_input}' was not passed to gateway verbatim"
-            )
+        assert captured == [u for u in test_inputs if u.strip()], (
+            "Inputs were not passed to the gateway verbatim and in order"
+        )
@@ -3,25 +3,16 @@ Brain Server Tests
 ==================
 Tests for the Razor Brain Intelligence Agent (FastAPI + Claude API).
 
-Run with: python brain/tests/test_server.py
-Or with pytest: pytest brain/tests/test_server.py -v
+Run with: pytest brain/tests/test_server.py -v
 """
 
-import asyncio
 import json
-import os
-import sys
-from pathlib import Path
-
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-# Mock the ANTHROPIC_API_KEY for testing
-os.environ["ANTHROPIC_API_KEY"] = "test_key_12345"
+import re
 
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
 from razor_brain.server import (
     app,
@@ -31,252 +22,169 @@ from razor_brain.server import (
     HealthResponse,
     SessionResponse,
     WebSocketMessage,
-    MODEL_NAME
+    MODEL_NAME,
+    _detect_actions_from_query,
 )
 
 
 # ─── Fixtures ─────────────────────────────────────────────────────────
 
-@pytest.fixture
-def client():
-    """FastAPI test client"""
-    return TestClient(app)
+@pytest.fixture(scope="session")
+def client(mock_anthropic):
+    """FastAPI test client — one ASGI transport for the whole session.
 
+    The context form runs the app lifespan, so brain.start() happens
+    once here instead of per-test. Depends on mock_anthropic so the
+    patch is already active when the lifespan constructs the client —
+    otherwise the warmup task fires a real network request mid-suite.
+    """
+    with TestClient(app) as c:
+        yield c
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def mock_anthropic():
-    """Mock Anthropic client"""
+    """Mock Anthropic client — patched once per session"""
     with patch("razor_brain.server.AsyncAnthropic") as mock:
         mock_client = AsyncMock()
         mock.return_value = mock_client
         yield mock_client
 
 
-# ─── Health Endpoint Tests ────────────────────────────────────────────
-
-def test_health_endpoint(client):
-    """Test GET /health returns correct status and model"""
-    response = client.get("/health")
-
-    assert response.status_code == 200
-    data = response.json()
-    assert data["status"] == "ok"
-    assert data["model"] == MODEL_NAME
-    print("  ✓ Health endpoint returns correct status and model")
-
-
-# ─── Session Endpoint Tests ───────────────────────────────────────────
-
-def test_session_new(client):
-    """Test POST /session/new creates new session"""
-    response = client.post("/session/new")
-
-    assert response.status_code == 200
-    data = response.json()
-    assert "session_id" in data
-    assert data["session_id"].startswith("session_")
-    print("  ✓ Session creation returns valid session_id")
-
-
-def test_session_new_unique(client):
-    """Test that multiple session creations return unique IDs"""
-    response1 = client.post("/session/new")
-    response2 = client.post("/session/new")
+@pytest_asyncio.fixture(scope="module")
+async def engine(mock_anthropic):
+    """One started BrainEngine per module — tests reset sessions instead
+    of paying client construction and start() per test."""
+    e = BrainEngine()
+    await e.start()
+    warmup = getattr(e, "_warmup_task", None)
+    if warmup:
+        await warmup  # let the (mocked) warmup settle in this loop
+    yield e
 
-    session1 = response1.json()["session_id"]
-    session2 = response2.json()["session_id"]
 
-    assert session1 != session2
-    print("  ✓ Multiple session creations return unique IDs")
-
-
-# ─── BrainEngine Tests ────────────────────────────────────────────────
-
-@pytest.mark.asyncio
-async def test_brain_engine_initialization():
-    """Test BrainEngine initializes correctly"""
-    engine = BrainEngine()
+@pytest.fixture(scope="module")
+def uninitialized_engine(mock_anthropic):
+    """Engine that was never started — simulates a missing API key."""
+    return BrainEngine()
 
-    assert engine.client is None
-    assert engine.sessions == {}
-    print("  ✓ BrainEngine initializes with correct defaults")
 
+class _FakeClaudeStream:
+    """Minimal stand-in for the SDK's streaming context manager.
 
-@pytest.mark.asyncio
-async def test_brain_engine_new_session():
-    """Test BrainEngine creates sessions correctly"""
-    engine = BrainEngine()
+    ``BrainEngine.process`` consumes ``client.messages.stream(...)`` as
+    an async context manager and iterates ``text_stream`` — this yields
+    the canned reply as a single chunk.
+    """
 
-    session_id = engine.new_session()
+    def __init__(self, text):
+        self._text = text
 
-    assert session_id.startswith("session_")
-    assert session_id in engine.sessions
-    assert engine.sessions[session_id] == []
-    print("  ✓ BrainEngine creates sessions correctly")
+    async def _gen(self):
+        yield self._text
 
+    async def __aenter__(self):
+        self.text_stream = self._gen()
+        return self
 
-@pytest.mark.asyncio
-async def test_brain_engine_process_without_api_key(mock_anthropic):
-    """Test BrainEngine handles missing API key gracefully"""
-    engine = BrainEngine()
-    # Don't call start() to simulate missing API key
+    async def __aexit__(self, *exc_info):
+        return False
 
-    response = await engine.process(
-        text="Hello",
-        metadata={},
-        request_id="test_req_1"
-    )
 
-    assert response.request_id == "test_req_1"
-    assert "not initialized" in response.text.lower()
-    assert response.intent == "error"
-    assert response.state == "error"
-    print("  ✓ BrainEngine handles missing API key gracefully")
-
-
-@pytest.mark.asyncio
-async def test_brain_engine_process_with_mock_claude(mock_anthropic):
-    """Test BrainEngine processes messages with mocked Claude API"""
-    # Setup mock response
-    mock_response = MagicMock()
-    mock_content = MagicMock()
-    mock_content.text = json.dumps({
-        "text": "Hello! How can I help you today?",
-        "intent": "greeting",
-        "entities": [],
-        "actions": [],
-        "state": "listening",
-        "confidence": 0.95
-    })
-    mock_response.content = [mock_content]
-    mock_anthropic.messages.create = AsyncMock(return_value=mock_response)
+@pytest.fixture
+def claude_reply(mock_anthropic):
+    """Point the mocked Claude API at a canned reply.
+
+    Accepts a dict (serialized to JSON), a raw string, or raise_exc= to
+    make the call fail — replaces the mock-object setup each test
+    used to build by hand.
+    """
+    def _set(payload_or_text, *, raise_exc=None):
+        # The engine consumes messages.stream as an async context
+        # manager, which AsyncMock's coroutine-returning children can't
+        # model — replace the attribute with a plain callable. Always
+        # replaced so nothing leaks between tests through the
+        # session-scoped mock.
+        if raise_exc is not None:
+            def _stream(**kwargs):
+                raise raise_exc
+            mock_anthropic.messages.stream = _stream
+            return
+        text = (
+            payload_or_text
+            if isinstance(payload_or_text, str)
+            else json.dumps(payload_or_text)
+        )
+        mock_anthropic.messages.stream = (
+            lambda **kwargs: _FakeClaudeStream(text)
+        )
 
-    engine = BrainEngine()
-    await engine.start()
-    session_id = engine.new_session()
+    return _set
 
-    response = await engine.process(
-        text="Hello Razor",
-        metadata={},
-        request_id="test_req_2",
-        session_id=session_id
-    )
 
-    assert response.request_id == "test_req_2"
-    assert response.text == "Hello! How can I help you today?"
-    assert response.intent == "greeting"
-    assert response.state == "listening"
-    assert response.latency_ms > 0
-    print("  ✓ BrainEngine processes messages with mocked Claude API")
+# Generated IDs are "<prefix>_" + 6 nonce hex chars + 8 sequence hex
+# chars (see server._next_id) — assert the full shape, not just the
+# prefix, so a regression in the generator can't slip past.
+_SESSION_ID_RE = re.compile(r"session_[0-9a-f]{14}")
+_REQ_ID_RE = re.compile(r"req_[0-9a-f]{14}")
 
 
-@pytest.mark.asyncio
-async def test_brain_engine_handles_non_json_response(mock_anthropic):
-    """Test BrainEngine handles non-JSON Claude responses"""
-    # Setup mock response with plain text
-    mock_response = MagicMock()
-    mock_content = MagicMock()
-    mock_content.text = "Sorry, I couldn't parse that."
-    mock_response.content = [mock_content]
-    mock_anthropic.messages.create = AsyncMock(return_value=mock_response)
+try:  # C decoder for response bodies when available
+    import orjson
 
-    engine = BrainEngine()
-    await engine.start()
+    def _parsed(response):
+        """Decode an endpoint response body (bytes) in one shot."""
+        return orjson.loads(response.content)
 
-    response = await engine.process(
-        text="Some unclear input",
-        metadata={},
-        request_id="test_req_3"
-    )
+except ImportError:  # pragma: no cover
 
-    assert response.request_id == "test_req_3"
-    assert response.text == "Sorry, I couldn't parse that."
-    assert response.intent == "question"  # Default fallback
-    print("  ✓ BrainEngine handles non-JSON responses gracefully")
+    def _parsed(response):
+        return response.json()
 
 
-@pytest.mark.asyncio
-async def test_brain_engine_handles_api_errors(mock_anthropic):
-    """Test BrainEngine handles Claude API errors gracefully"""
-    # Setup mock to raise exception
-    mock_anthropic.messages.create = AsyncMock(
-        side_effect=Exception("API connection failed")
-    )
-
-    engine = BrainEngine()
-    await engine.start()
-
-    response = await engine.process(
-        text="Test error handling",
-        metadata={},
-        request_id="test_req_4"
-    )
-
-    assert response.request_id == "test_req_4"
-    assert response.intent == "error"
-    assert response.state == "error"
-    assert "trouble processing" in response.text.lower()
-    print("  ✓ BrainEngine handles API errors gracefully")
+# ─── Endpoint / Model Smoke Tests ─────────────────────────────────────
+# One parametrized test covers the trivial "does it respond / does the
+# model hold its fields" checks — each case is a check callable, so a
+# failure still reports its own id and traceback.
 
+def _check_health(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    data = _parsed(response)
+    assert data["status"] == "ok"
+    assert data["model"] == MODEL_NAME
 
-@pytest.mark.asyncio
-async def test_brain_engine_maintains_conversation_history(mock_anthropic):
-    """Test BrainEngine maintains conversation history across turns"""
-    # Setup mock response
-    mock_response = MagicMock()
-    mock_content = MagicMock()
-    mock_content.text = json.dumps({
-        "text": "Response",
-        "intent": "question",
-        "entities": [],
-        "actions": [],
-        "state": "listening"
-    })
-    mock_response.content = [mock_content]
-    mock_anthropic.messages.create = AsyncMock(return_value=mock_response)
-
-    engine = BrainEngine()
-    await engine.start()
-    session_id = engine.new_session()
 
-    # Send two messages
-    await engine.process("First message", {}, "req_1", session_id)
-    await engine.process("Second message", {}, "req_2", session_id)
+def _check_session_new(client):
+    response = client.post("/session/new")
+    assert response.status_code == 200
+    data = _parsed(response)
+    assert "session_id" in data
+    assert _SESSION_ID_RE.fullmatch(data["session_id"])
 
-    # Check history was maintained
-    assert len(engine.sessions[session_id]) == 4  # 2 user + 2 assistant
-    assert engine.sessions[session_id][0]["role"] == "user"
-    assert engine.sessions[session_id][0]["content"] == "First message"
-    assert engine.sessions[session_id][1]["role"] == "assistant"
-    print("  ✓ BrainEngine maintains conversation history")
 
+def _check_session_unique(client):
+    session1 = _parsed(client.post("/session/new"))["session_id"]
+    session2 = _parsed(client.post("/session/new"))["session_id"]
+    assert session1 != session2
 
-# ─── WebSocket Message Model Tests ────────────────────────────────────
 
-def test_websocket_message_validation():
-    """Test WebSocketMessage model validation"""
-    # Valid message
+def _check_ws_message_validation(client):
     msg = WebSocketMessage(text="Hello", metadata={"source": "test"})
     assert msg.text == "Hello"
     assert msg.metadata == {"source": "test"}
     assert msg.stream is False
-    assert msg.request_id.startswith("req_")
-    print("  ✓ WebSocketMessage validates correctly")
+    assert _REQ_ID_RE.fullmatch(msg.request_id)
 
 
-def test_websocket_message_defaults():
-    """Test WebSocketMessage default values"""
+def _check_ws_message_defaults(client):
     msg = WebSocketMessage(text="Test")
     assert msg.metadata == {}
     assert msg.stream is False
-    assert msg.request_id.startswith("req_")
-    print("  ✓ WebSocketMessage has correct defaults")
-
+    assert _REQ_ID_RE.fullmatch(msg.request_id)
 
-# ─── BrainResponse Model Tests ────────────────────────────────────────
 
-def test_brain_response_creation():
-    """Test BrainResponse model creation"""
+def _check_brain_response_creation(client):
     response = BrainResponse(
         request_id="test_123",
         text="Response text",
@@ -286,7 +194,6 @@ def test_brain_response_creation():
         state="listening",
         latency_ms=150.5
     )
-
     assert response.type == "response"
     assert response.request_id == "test_123"
     assert response.text == "Response text"
@@ -295,132 +202,231 @@ def test_brain_response_creation():
     assert len(response.actions) == 1
     assert response.state == "listening"
     assert response.latency_ms == 150.5
-    print("  ✓ BrainResponse creates correctly")
 
 
-def test_brain_response_serialization():
-    """Test BrainResponse serializes to JSON correctly"""
+def _check_brain_response_serialization(client):
     response = BrainResponse(
         request_id="test_456",
         text="Test",
         intent="question"
     )
-
     data = response.model_dump()
-
     assert data["type"] == "response"
     assert data["request_id"] == "test_456"
     assert data["text"] == "Test"
     assert data["intent"] == "question"
     assert data["entities"] == []
     assert data["actions"] == []
-    print("  ✓ BrainResponse serializes correctly")
+
+
+@pytest.mark.parametrize(
+    "check",
+    [
+        pytest.param(_check_health, id="health-endpoint"),
+        pytest.param(_check_session_new, id="session-new"),
+        pytest.param(_check_session_unique, id="session-new-unique"),
+        pytest.param(_check_ws_message_validation, id="ws-message-validation"),
+        pytest.param(_check_ws_message_defaults, id="ws-message-defaults"),
+        pytest.param(_check_brain_response_creation, id="brain-response-creation"),
+        pytest.param(_check_brain_response_serialization, id="brain-response-serialization"),
+    ],
+)
+def test_smoke(client, check):
+    """Trivial endpoint and model checks, one parametrized body."""
+    check(client)
+
+
+def test_action_pattern_list_priority():
+    """Fallback detection resolves by pattern-list order, not by which
+    pattern occurs first in the utterance — "pipeline" (a Salesforce
+    pattern) outranks the earlier-positioned "last call"."""
+    actions = _detect_actions_from_query("after my last call, show the pipeline")
+    assert actions
+    assert actions[0]["action"] == "get_pipeline"
+
+
+# ─── BrainEngine Tests ────────────────────────────────────────────────
+
+async def test_brain_engine_initialization():
+    """Test BrainEngine initializes correctly"""
+    engine = BrainEngine()
+
+    assert engine.client is None
+    assert engine.sessions == {}
+
+
+async def test_brain_engine_new_session(engine):
+    """Test BrainEngine creates sessions correctly"""
+    engine.sessions.clear()
+
+    session_id = engine.new_session()
+
+    assert _SESSION_ID_RE.fullmatch(session_id)
+    assert session_id in engine.sessions
+    assert len(engine.sessions[session_id]) == 0
+
+
+async def test_brain_engine_process_without_api_key(uninitialized_engine):
+    """Test BrainEngine handles missing API key gracefully"""
+    engine = uninitialized_engine  # never started
+
+    # "Hello" is answered by the quick-response cache, which works (by
+    # design) without a client — use an utterance that must reach the
+    # Claude path to hit the initialization guard.
+    response = await engine.process(
+        text="Tell me something interesting",
+        metadata={},
+        request_id="test_req_1"
+    )
+
+    assert response.request_id == "test_req_1"
+    assert "not initialized" in response.text.lower()
+    assert response.intent == "error"
+    assert response.state == "error"
+
+
+# Sentinel for the parametrized dispatch test: make the API call raise
+RAISE_API_ERR = object()
+
+# One exception instance for the whole module — the error path only
+# cares that the call raises, not about a fresh traceback per test.
+API_ERR = RuntimeError("API connection failed")
+
+# Canned replies serialized once at import — tests and the claude_reply
+# fixture reuse the strings instead of re-dumping the same dicts.
+GREETING_REPLY = json.dumps({
+    "text": "Hello! How can I help you today?",
+    "intent": "greeting",
+    "entities": [],
+    "actions": [],
+    "state": "listening",
+    "confidence": 0.95,
+})
+GENERIC_REPLY = json.dumps({
+    "text": "Response",
+    "intent": "question",
+    "entities": [],
+    "actions": [],
+    "state": "listening",
+})
+PROCESSED_REPLY = json.dumps({
+    "text": "Processed response",
+    "intent": "question",
+    "entities": [],
+    "actions": [],
+    "state": "listening",
+})
+
+
+@pytest.mark.parametrize(
+    "text,payload,intent,state,substr",
+    [
+        pytest.param(
+            # Must dodge the quick-response cache and pattern detection
+            # so the canned Claude reply is what comes back.
+            "Tell me something interesting",
+            GREETING_REPLY,
+            "greeting",
+            "listening",
+            "hello! how can i help you today?",
+            id="valid-json",
+        ),
+        pytest.param(
+            "Some unclear input",
+            "Sorry, I couldn't parse that.",
+            "question",  # default fallback intent
+            None,
+            "sorry, i couldn't parse that.",
+            id="non-json",
+        ),
+        pytest.param(
+            "Test error handling",
+            RAISE_API_ERR,
+            "error",
+            "error",
+            "trouble processing",
+            id="api-error",
+        ),
+    ],
+)
+async def test_brain_engine_dispatches(
+    engine, claude_reply, text, payload, intent, state, substr
+):
+    """One body for the valid-JSON / non-JSON / API-error reply paths."""
+    if payload is RAISE_API_ERR:
+        claude_reply(None, raise_exc=API_ERR)
+    else:
+        claude_reply(payload)
+
+    engine.sessions.clear()
+    session_id = engine.new_session()
+
+    response = await engine.process(
+        text=text,
+        metadata={},
+        request_id="test_req_2",
+        session_id=session_id,
+    )
+
+    assert response.request_id == "test_req_2"
+    assert response.intent == intent
+    if state is not None:
+        assert response.state == state
+    assert substr in response.text.lower()
+    assert response.latency_ms >= 0
+
+
+async def test_brain_engine_maintains_conversation_history(engine, claude_reply):
+    """Test BrainEngine maintains conversation history across turns"""
+    claude_reply(GENERIC_REPLY)
+
+    engine.sessions.clear()
+    session_id = engine.new_session()
+
+    # Send two messages
+    await engine.process("First message", {}, "req_1", session_id)
+    await engine.process("Second message", {}, "req_2", session_id)
+
+    # Check history was maintained
+    assert len(engine.sessions[session_id]) == 4  # 2 user + 2 assistant
+    assert engine.sessions[session_id][0]["role"] == "user"
+    assert engine.sessions[session_id][0]["content"] == "First message"
+    assert engine.sessions[session_id][1]["role"] == "assistant"
 
 
 # ─── Integration Tests ────────────────────────────────────────────────
 
-@pytest.mark.asyncio
-async def test_process_endpoint(mock_anthropic):
-    """Test POST /process endpoint"""
-    # Setup mock
-    mock_response = MagicMock()
-    mock_content = MagicMock()
-    mock_content.text = json.dumps({
-        "text": "Processed response",
-        "intent": "question",
-        "entities": [],
-        "actions": [],
-        "state": "listening"
-    })
-    mock_response.content = [mock_content]
-    mock_anthropic.messages.create = AsyncMock(return_value=mock_response)
-
-    # Manually start the brain engine for this test
-    await brain.start()
-
-    # Use async client for testing
-    from httpx import AsyncClient
-    async with AsyncClient(
-        transport=None, base_url="http://test"
-    ) as ac:
-        ac.app = app  # Attach the FastAPI app
-
-        # Use TestClient for synchronous testing
-        from fastapi.testclient import TestClient
-        client = TestClient(app)
-
-        response = client.post(
-            "/process",
-            json={
-                "text": "Test input",
-                "metadata": {"source": "test"},
-                "stream": False
-            }
+def test_process_endpoint(client, monkeypatch):
+    """Test POST /process endpoint request/response schema.
+
+    The engine is stubbed at its boundary — endpoint tests only need to
+    assert routing and serialization, not the Claude call graph (that's
+    covered by the engine tests above).
+    """
+    async def fake_process(text, metadata, request_id, session_id=None):
+        return BrainResponse(
+            request_id=request_id,
+            text="Processed response",
+            intent="question",
+            entities=[],
+            actions=[],
+            state="listening",
+            latency_ms=1.0,
         )
 
+    monkeypatch.setattr(brain, "process", fake_process)
+
+    response = client.post(
+        "/process",
+        json={
+            "text": "Test input",
+            "metadata": {"source": "test"},
+            "stream": False
+        }
+    )
+
     assert response.status_code == 200
-    data = response.json()
+    data = _parsed(response)
     assert data["type"] == "response"
     assert "request_id" in data
     assert data["text"] == "Processed response"
-    print("  ✓ POST /process endpoint works correctly")
-
-
-# ─── Run Tests ────────────────────────────────────────────────────────
-
-if __name__ == "__main__":
-    print("\n" + "=" * 70)
-    print("RAZOR BRAIN SERVER TESTS")
-    print("=" * 70 + "\n")
-
-    # Run with pytest if available, otherwise basic tests
-    try:
-        import pytest
-
-        # Run pytest
-        exit_code = pytest.main([
-            __file__,
-            "-v",
-            "--tb=short",
-            "--asyncio-mode=auto"
-        ])
-
-        sys.exit(exit_code)
-
-    except ImportError:
-        print("pytest not installed. Run: pip install pytest pytest-asyncio")
-        print("\nRunning basic non-async tests only:\n")
-
-        passed = 0
-        failed = 0
-
-        # Create a client for basic tests
-        client = TestClient(app)
-
-        # Run basic tests
-        tests = [
-            ("Health endpoint", lambda: test_health_endpoint(client)),
-            ("Session creation", lambda: test_session_new(client)),
-            ("Session uniqueness", lambda: test_session_new_unique(client)),
-            ("WebSocket message validation", test_websocket_message_validation),
-            ("WebSocket message defaults", test_websocket_message_defaults),
-            ("BrainResponse creation", test_brain_response_creation),
-            ("BrainResponse serialization", test_brain_response_serialization),
-        ]
-
-        for name, test_fn in tests:
-            try:
-                test_fn()
-                passed += 1
-            except AssertionError as e:
-                print(f"  ✗ {name} FAILED: {e}")
-                failed += 1
-            except Exception as e:
-                print(f"  ✗ {name} ERROR: {e}")
-                failed += 1
-
-        print(f"\n{'=' * 70}")
-        print(f"Results: {passed} passed, {failed} failed")
-        print("=" * 70)
-
-        sys.exit(1 if failed > 0 else 0)
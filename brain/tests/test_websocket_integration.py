@@ -6,10 +6,27 @@ Quick manual test to verify WebSocket protocol matches specification.
 Run with: python3 brain/tests/test_websocket_integration.py
 """
 
-import json
 import asyncio
+import json
+import os
+
+import pytest
 import websockets
 
+# Needs a manually started server — skipped by default so CI doesn't
+# burn connection timeouts on a socket that was never going to answer.
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        not os.getenv("RUN_INTEGRATION"),
+        reason="requires a live brain server; set RUN_INTEGRATION=1",
+    ),
+]
+
+# Tight by default so a red cycle fails in seconds, not tens of them;
+# slow CI can widen the window without touching the test.
+WS_TEST_TIMEOUT = float(os.getenv("WS_TEST_TIMEOUT", "2.0"))
+
 
 async def test_websocket_protocol():
     """Test WebSocket sends and receives correct format"""
@@ -20,7 +37,7 @@ async def test_websocket_protocol():
     print()
 
     try:
-        async with websockets.connect(uri, timeout=5) as websocket:
+        async with websockets.connect(uri, open_timeout=1) as websocket:
             print("✓ Connected to WebSocket")
 
             # Test message
@@ -35,7 +52,9 @@ async def test_websocket_protocol():
             await websocket.send(json.dumps(message))
 
             # Receive response
-            response_raw = await asyncio.wait_for(websocket.recv(), timeout=10)
+            response_raw = await asyncio.wait_for(
+                websocket.recv(), timeout=WS_TEST_TIMEOUT
+            )
             response = json.loads(response_raw)
 
             print(f"\nReceived: {json.dumps(response, indent=2)}")